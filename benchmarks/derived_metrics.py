@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark derived-metric computation (CTR, CPC, ROAS) over many groups
+Compares the original per-row loop against derive_metrics with and without NumPy
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_processor
+from data_processor import derive_metrics
+
+def make_groups(count, seed):
+    """Return impressions, clicks, spend and revenue columns for count random groups"""
+    rng = random.Random(seed)
+    impressions = [rng.randint(0, 50000) for _ in range(count)]
+    clicks = [rng.randint(0, max(1, impressions[i] // 20)) if impressions[i] else 0 for i in range(count)]
+    spend = [round(rng.uniform(0, 5000), 2) if clicks[i] else 0.0 for i in range(count)]
+    revenue = [round(rng.uniform(0, 20000), 2) for _ in range(count)]
+    return impressions, clicks, spend, revenue
+
+def loop_metrics(impressions, clicks, spend, attributed_revenue):
+    """Per-row computation as done before the metrics layer existed"""
+    result = []
+    for imp, clk, sp, rev in zip(impressions, clicks, spend, attributed_revenue):
+        ctr = (clk / imp) * 100 if imp > 0 else 0
+        cpc = sp / clk if clk > 0 else 0
+        roas = rev / sp if sp > 0 else 0
+        result.append((round(sp, 2), round(rev, 2), round(ctr, 3), round(cpc, 2), round(roas, 2)))
+    return result
+
+def timed(function, columns):
+    start = time.perf_counter()
+    function(*columns)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark derived metrics over many groups")
+    parser.add_argument("--groups", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    columns = make_groups(args.groups, args.seed)
+    print(f"Derived metrics benchmark: {args.groups:,} groups")
+    
+    baseline = timed(loop_metrics, columns)
+    print(f"{'per-row loop':<16} {baseline:8.3f}s")
+    
+    numpy = data_processor.np
+    if numpy is not None:
+        elapsed = timed(derive_metrics, columns)
+        print(f"{'numpy':<16} {elapsed:8.3f}s  {baseline / elapsed:5.2f}x")
+    else:
+        print(f"{'numpy':<16} not installed")
+    
+    data_processor.np = None
+    try:
+        elapsed = timed(derive_metrics, columns)
+    finally:
+        data_processor.np = numpy
+    print(f"{'pure python':<16} {elapsed:8.3f}s  {baseline / elapsed:5.2f}x")
+
+if __name__ == "__main__":
+    main()
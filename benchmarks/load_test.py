@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Load test for the dashboard server
+Runs many concurrent keep-alive clients against server.py and reports requests/second and latency percentiles
+"""
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = [
+    "/dashboard_data.json",
+    "/api/summary",
+    "/api/platforms?start_date=2024-03-01",
+    "/api/campaigns?platform=Google",
+]
+
+def run_client(host, port, paths, requests, keepalive, latencies, errors):
+    """Issue requests round-robin over paths, recording each latency in milliseconds"""
+    connection = None
+    for i in range(requests):
+        if connection is None:
+            connection = http.client.HTTPConnection(host, port, timeout=30)
+        path = paths[i % len(paths)]
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(f"{response.status} {path}")
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(f"{type(e).__name__} {path}")
+            connection.close()
+            connection = None
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+        if not keepalive or response.getheader("Connection", "").lower() == "close":
+            connection.close()
+            connection = None
+    if connection is not None:
+        connection.close()
+
+def percentile(values, fraction):
+    """Return the value at the given fraction (0-1) of the sorted values"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the dashboard server")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=50, help="number of concurrent clients")
+    parser.add_argument("--requests", type=int, default=100, help="requests per client")
+    parser.add_argument("--path", action="append", dest="paths",
+                        help="path to request (repeatable; defaults to a mix of JSON and API paths)")
+    parser.add_argument("--no-keepalive", action="store_true", help="open a new connection per request")
+    args = parser.parse_args()
+    
+    url = urlsplit(args.url)
+    paths = args.paths or DEFAULT_PATHS
+    latencies = []
+    errors = []
+    threads = [threading.Thread(target=run_client,
+                                args=(url.hostname, url.port or 80, paths, args.requests,
+                                      not args.no_keepalive, latencies, errors))
+               for _ in range(args.clients)]
+    
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    print(f"Load test: {args.clients} clients x {args.requests} requests against {args.url}"
+          f" ({'new connection per request' if args.no_keepalive else 'keep-alive'})")
+    print(f"Completed: {len(latencies):,} requests in {elapsed:.2f}s ({len(latencies) / elapsed:,.0f} req/s)")
+    print(f"Errors: {len(errors):,}")
+    print(f"Latency ms: p50 {percentile(latencies, 0.5):.2f}  p90 {percentile(latencies, 0.9):.2f}"
+          f"  p99 {percentile(latencies, 0.99):.2f}  max {latencies[-1] if latencies else 0:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Benchmark parallel loading and aggregation of the platform CSVs
+Times DataProcessor.load_parallel for 1..N worker processes and reports the speedup over one worker
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_processor import DataProcessor, PARALLEL_CHUNK_BYTES
+
+def time_load(data_dir, workers, chunk_bytes, repeat):
+    """Return the best wall time of load_parallel over repeat runs and the rows aggregated"""
+    best = None
+    rows = 0
+    for _ in range(repeat):
+        processor = DataProcessor(data_dir)
+        start = time.perf_counter()
+        rows = processor.load_parallel(workers=workers, chunk_bytes=chunk_bytes)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel CSV loading from 1 to N workers")
+    parser.add_argument("--data-dir", default="/home/runner/work/BI_Dasboard/BI_Dasboard/data")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-mb", type=float, default=PARALLEL_CHUNK_BYTES / (1024 * 1024))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    chunk_bytes = int(args.chunk_mb * 1024 * 1024)
+    print(f"Parallel load benchmark: {args.data_dir} (CPUs: {os.cpu_count()})")
+    print(f"{'workers':>8} {'seconds':>10} {'rows/sec':>12} {'speedup':>8}")
+    
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        elapsed, rows = time_load(args.data_dir, workers, chunk_bytes, args.repeat)
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>10.3f} {rows / elapsed:>12,.0f} {baseline / elapsed:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
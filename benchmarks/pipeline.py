@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Benchmark the DataProcessor pipeline on generated datasets of increasing size
+Builds 10k/1M/10M-row datasets with generate_data_simple.py, times load_data, the
+aggregation, each get_* method and export_dashboard_data in a fresh process per size,
+records peak memory and writes the results as JSON for comparison between commits
+(--fast builds the datasets with generate_data_fast.py instead)
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import generate_data_simple
+import data_processor
+from data_processor import DataProcessor, MARKETING_PLATFORMS, peak_memory_mb
+
+MARKETING_FIELDS = ['date', 'tactic', 'state', 'campaign', 'impressions', 'clicks', 'spend', 'attributed_revenue']
+BUSINESS_FIELDS = ['date', 'orders', 'new_orders', 'new_customers', 'total_revenue', 'gross_profit', 'cogs']
+
+GENERATORS = OrderedDict([
+    ('Facebook', generate_data_simple.generate_facebook_data),
+    ('Google', generate_data_simple.generate_google_data),
+    ('TikTok', generate_data_simple.generate_tiktok_data),
+])
+
+# Days generated per call to the platform generators, so rows are streamed to disk
+DAYS_PER_BATCH = 30
+
+# Most days of data a dataset spans; larger sizes copy every campaign per day instead of
+# running the calendar out for centuries
+MAX_DAYS = 365
+
+# Average rows per day of the simple generators: 4 campaigns each on Facebook (1-3 rows),
+# Google (1-2 rows) and TikTok (one row on 70% of days)
+SIMPLE_ROWS_PER_DAY = 4 * 2 + 4 * 1.5 + 4 * 0.7
+
+def parse_size(text):
+    """Parse a row count such as 10000, 10k or 1M"""
+    multipliers = {'k': 1000, 'm': 1000000}
+    text = text.strip().lower()
+    if text and text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+def format_size(rows):
+    """Format a row count the way parse_size reads it"""
+    if rows % 1000000 == 0:
+        return f"{rows // 1000000}M"
+    if rows % 1000 == 0:
+        return f"{rows // 1000}k"
+    return str(rows)
+
+def generate_dataset(directory, rows, seed):
+    """Write platform and business CSVs with at least rows marketing rows
+    
+    Days are added in batches until the row target is reached. Sizes that would span more
+    than MAX_DAYS days generate every campaign several times per day instead, with a copy
+    number appended to its name. Returns the dataset description that is also saved as
+    dataset.json.
+    """
+    random.seed(seed)
+    generate_data_simple.normal_random.next_val = None
+    os.makedirs(directory, exist_ok=True)
+    
+    files = {name: open(os.path.join(directory, filename), 'w', newline='', encoding='utf-8')
+             for name, filename in MARKETING_PLATFORMS.items()}
+    try:
+        writers = {name: csv.DictWriter(f, fieldnames=MARKETING_FIELDS) for name, f in files.items()}
+        for writer in writers.values():
+            writer.writeheader()
+        
+        copies = max(1, math.ceil(rows / (SIMPLE_ROWS_PER_DAY * MAX_DAYS)))
+        width = len(str(copies - 1))
+        start = datetime(2024, 1, 1)
+        written = 0
+        days = 0
+        while written < rows:
+            dates = [start + timedelta(days=days + offset) for offset in range(DAYS_PER_BATCH)]
+            for name, generator in GENERATORS.items():
+                for copy in range(copies):
+                    batch = generator(dates)
+                    if copies > 1:
+                        for row in batch:
+                            row['campaign'] = f"{row['campaign']}_{copy:0{width}d}"
+                    writers[name].writerows(batch)
+                    written += len(batch)
+            days += DAYS_PER_BATCH
+    finally:
+        for f in files.values():
+            f.close()
+    
+    business = generate_data_simple.generate_business_data([start + timedelta(days=day) for day in range(days)])
+    generate_data_simple.write_csv(os.path.join(directory, 'business.csv'), business, BUSINESS_FIELDS)
+    
+    dataset = {'target_rows': rows, 'seed': seed, 'generator': 'simple', 'marketing_rows': written, 'days': days,
+               'campaign_copies': copies, 'max_days': MAX_DAYS}
+    with open(os.path.join(directory, 'dataset.json'), 'w') as f:
+        json.dump(dataset, f)
+    return dataset
+
+def generate_fast_dataset(directory, rows, seed):
+    """Write a dataset of about rows marketing rows with the NumPy generator in generate_data_fast.py"""
+    import generate_data_fast
+    
+    per_copy = sum(generate_data_fast.expected_rows_per_day(profile)
+                   for profile in generate_data_fast.PLATFORM_PROFILES.values()) * MAX_DAYS
+    copies = max(1, math.ceil(rows / per_copy))
+    counts = generate_data_fast.generate(directory, MAX_DAYS, copies, seed)
+    written = sum(count for filename, count in counts.items() if filename != 'business.csv')
+    
+    dataset = {'target_rows': rows, 'seed': seed, 'generator': 'fast', 'marketing_rows': written, 'days': MAX_DAYS,
+               'campaign_copies': copies, 'max_days': MAX_DAYS}
+    with open(os.path.join(directory, 'dataset.json'), 'w') as f:
+        json.dump(dataset, f)
+    return dataset
+
+def load_dataset(directory, rows, seed, generator):
+    """Return the description of a previously generated matching dataset, or None"""
+    try:
+        with open(os.path.join(directory, 'dataset.json')) as f:
+            dataset = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Datasets generated before the MAX_DAYS cap span too many days to be comparable
+    if (dataset.get('target_rows'), dataset.get('seed'), dataset.get('generator'),
+            dataset.get('max_days')) != (rows, seed, generator, MAX_DAYS):
+        return None
+    return dataset
+
+def measure(data_dir):
+    """Time every pipeline stage on data_dir in this process and return the results"""
+    processor = DataProcessor(data_dir)
+    stages = OrderedDict()
+    
+    def timed(name, function):
+        start = time.perf_counter()
+        result = function()
+        stages[name] = time.perf_counter() - start
+        return result
+    
+    timed('load_data', processor.load_data)
+    # The unfiltered aggregation is cached, so the get_* timings below exclude the scan
+    timed('aggregate', processor.aggregate)
+    daily = timed('calculate_daily_metrics', processor.calculate_daily_metrics)
+    timed('get_platform_performance', processor.get_platform_performance)
+    timed('get_campaign_performance', processor.get_campaign_performance)
+    timed('get_summary_metrics', lambda: processor.get_summary_metrics(daily))
+    with tempfile.TemporaryDirectory() as output_dir:
+        timed('export_dashboard_data',
+              lambda: processor.export_dashboard_data(os.path.join(output_dir, 'dashboard_data.json')))
+    return {'stages': stages, 'peak_memory_mb': peak_memory_mb()}
+
+def git_commit():
+    """Return the commit the working tree is at, or None outside a git checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_comparison(results, baseline):
+    """Print each stage's time relative to a previous results file"""
+    previous = {entry['size']: entry for entry in baseline.get('results', [])}
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} (ratio > 1 is slower):")
+    for entry in results:
+        old = previous.get(entry['size'])
+        if old is None:
+            print(f"{entry['size']:>6}  not in baseline")
+            continue
+        ratios = [f"{stage} {seconds / old['stages'][stage]:.2f}x"
+                  for stage, seconds in entry['stages'].items() if old['stages'].get(stage)]
+        print(f"{entry['size']:>6}  " + "  ".join(ratios))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the data pipeline on generated datasets")
+    parser.add_argument("--sizes", default="10k,1M,10M",
+                        help="comma-separated marketing row counts (default: 10k,1M,10M)")
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "bi_dashboard_benchmark"),
+                        help="where generated datasets are kept and reused between runs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fast", action="store_true",
+                        help="generate datasets with the NumPy generator in generate_data_fast.py")
+    parser.add_argument("--output", default="pipeline_results.json", help="machine-readable results file")
+    parser.add_argument("--compare", metavar="RESULTS", help="results file of an earlier run to compare with")
+    parser.add_argument("--measure", metavar="DATA_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.measure:
+        # Child process: one dataset per process keeps peak memory per size
+        print(json.dumps(measure(args.measure)))
+        return
+    
+    results = []
+    for rows in [parse_size(size) for size in args.sizes.split(',')]:
+        size = format_size(rows)
+        generator = 'fast' if args.fast else 'simple'
+        data_dir = os.path.join(args.work_dir, f"{generator}-rows-{size}-seed-{args.seed}")
+        dataset = load_dataset(data_dir, rows, args.seed, generator)
+        if dataset is None:
+            print(f"Generating {size} rows in {data_dir}...")
+            start = time.perf_counter()
+            dataset = (generate_fast_dataset if args.fast else generate_dataset)(data_dir, rows, args.seed)
+            print(f"  {dataset['marketing_rows']:,} rows over {dataset['days']:,} days "
+                  f"in {time.perf_counter() - start:.1f}s")
+        
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), '--measure', data_dir],
+                               capture_output=True, text=True, check=True)
+        entry = {'size': size, 'marketing_rows': dataset['marketing_rows'], 'days': dataset['days']}
+        entry.update(json.loads(child.stdout.splitlines()[-1]))
+        results.append(entry)
+        
+        total = sum(entry['stages'].values())
+        peak = entry['peak_memory_mb']
+        memory = f"  peak {peak:.1f} MB" if peak is not None else ""
+        print(f"{size:>6}  {entry['marketing_rows']:>12,} rows  {total:8.2f}s total{memory}")
+        for stage, seconds in entry['stages'].items():
+            print(f"        {stage:<26} {seconds:9.4f}s")
+    
+    report = {
+        'commit': git_commit(),
+        'created': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': data_processor.np is not None,
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark dashboard JSON serialization
+Reports encode time, bytes and gzipped bytes for every encoder in row and columnar layout
+"""
+import argparse
+import gzip
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_processor
+from data_processor import DataProcessor, JSON_ENCODERS, TIME_SERIES_PERIODS, encode_json, to_columnar
+
+def time_encode(data, encoder, repeat):
+    """Return the best encode time over repeat runs and the encoded bytes"""
+    best = None
+    body = b''
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = encode_json(data, encoder)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, body
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard JSON encoders and layouts")
+    parser.add_argument("--data-dir", default="/home/runner/work/BI_Dasboard/BI_Dasboard/data")
+    parser.add_argument("--period", choices=TIME_SERIES_PERIODS, default='day')
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    processor = DataProcessor(args.data_dir)
+    processor.load_cached()
+    rows = processor.get_dashboard_data(period=args.period)
+    start = time.perf_counter()
+    columnar = to_columnar(rows)
+    convert = time.perf_counter() - start
+    
+    print(f"Serialization benchmark: {args.data_dir} ({len(rows['daily_metrics']):,} daily rows, "
+          f"{len(rows['campaign_performance']):,} campaigns)")
+    if data_processor.orjson is None:
+        print("orjson is not installed; the orjson encoder falls back to compact")
+    print(f"{'encoder':<10} {'layout':<9} {'seconds':>9} {'bytes':>12} {'gzip bytes':>12}")
+    
+    for encoder in JSON_ENCODERS:
+        for layout, data, extra in (('rows', rows, 0.0), ('columnar', columnar, convert)):
+            elapsed, body = time_encode(data, encoder, args.repeat)
+            compressed = len(gzip.compress(body, compresslevel=9))
+            print(f"{encoder:<10} {layout:<9} {elapsed + extra:9.4f} {len(body):12,} {compressed:12,}")
+    print(f"(columnar times include {convert:.4f}s to convert the rows)")
+
+if __name__ == "__main__":
+    main()
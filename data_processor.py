@@ -2,210 +2,2286 @@
 Marketing Intelligence Dashboard - Data Processing Module
 This module loads and processes the marketing and business data for the dashboard
 """
+import argparse
+import cProfile
 import csv
+import functools
+import gzip
+import hashlib
+import inspect
 import json
-from datetime import datetime
-from collections import defaultdict, OrderedDict
+import math
+from array import array
+from datetime import datetime, timedelta
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from bisect import bisect_left, bisect_right
+from itertools import chain, islice, repeat
+import mmap
 import os
+import sqlite3
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are written without it
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # optional: the 'orjson' encoder falls back to compact stdlib JSON
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:  # optional: derived metrics fall back to plain Python
+    np = None
+
+# Built-in marketing platforms and the CSV file each one is loaded from; other platform
+# files in a data directory are found by PlatformRegistry.discover()
+MARKETING_PLATFORMS = OrderedDict([
+    ('Facebook', 'facebook.csv'),
+    ('Google', 'google.csv'),
+    ('TikTok', 'tiktok.csv'),
+])
+
+# Column layouts of the in-memory tables. 'category' columns are dictionary
+# encoded, 'int' and 'float' columns are stored in typed arrays.
+MARKETING_SCHEMA = [
+    ('date', 'category'),
+    ('platform', 'category'),
+    ('tactic', 'category'),
+    ('state', 'category'),
+    ('campaign', 'category'),
+    ('impressions', 'int'),
+    ('clicks', 'int'),
+    ('spend', 'float'),
+    ('attributed_revenue', 'float'),
+]
+
+BUSINESS_SCHEMA = [
+    ('date', 'category'),
+    ('orders', 'int'),
+    ('new_orders', 'int'),
+    ('new_customers', 'int'),
+    ('total_revenue', 'float'),
+    ('gross_profit', 'float'),
+    ('cogs', 'float'),
+]
+
+# Business columns joined to the daily marketing totals
+DAILY_BUSINESS_COLUMNS = ('orders', 'new_customers', 'total_revenue', 'gross_profit')
+
+# Marketing dimensions that queries can filter on, besides the date range
+FILTER_DIMENSIONS = ('platform', 'campaign', 'state', 'tactic')
+
+# Dimensions of the rollup cube (its finest grain) and the additive measures it sums
+CUBE_DIMENSIONS = ('date', 'platform', 'campaign', 'state', 'tactic')
+ADDITIVE_MEASURES = ('impressions', 'clicks', 'spend', 'attributed_revenue')
+
+# Calendar buckets and trailing windows (in days) the daily time series can be rolled up to
+PERIOD_BUCKETS = ('week', 'month', 'quarter')
+ROLLING_WINDOWS = OrderedDict([('7d', 7), ('28d', 28)])
+TIME_SERIES_PERIODS = ('day',) + PERIOD_BUCKETS + tuple(ROLLING_WINDOWS)
+
+# Below this many groups derived metrics are computed in plain Python even with NumPy
+VECTORIZE_MIN_GROUPS = 64
+
+# Number of CSV rows parsed per batch when filling column tables
+CSV_BATCH_SIZE = 65536
+
+# Target size of the byte ranges large CSVs are split into for parallel workers
+PARALLEL_CHUNK_BYTES = 32 * 1024 * 1024
+
+# Format version of the persisted incremental state
+STATE_VERSION = 2
+
+# Leading bytes of each source file hashed to detect rewritten (not appended) files
+FINGERPRINT_BYTES = 4096
+
+# Format version of the binary columnar snapshot
+SNAPSHOT_VERSION = 2
+
+# Format version of the sharded export manifest and the campaign rows per page shard
+SHARD_VERSION = 1
+CAMPAIGN_PAGE_SIZE = 100
+
+# json.dumps separators for compact (non-indented) output
+COMPACT_SEPARATORS = (',', ':')
+
+# Encoders encode_json() accepts for exports and API responses
+JSON_ENCODERS = ('indent', 'compact', 'orjson')
+
+# Sketches kept by GroupSketches: distinct count estimates of these dimensions and
+# quantiles of per-row spend and CPC
+SKETCH_DIMENSIONS = ('campaign', 'state', 'tactic')
+SKETCH_QUANTILES = (0.5, 0.9, 0.99)
+HLL_PRECISION = 11
+QUANTILE_ACCURACY = 0.01
+QUANTILE_MAX_BINS = 2048
+
+# Where DataProcessor keeps loaded rows: typed column tables in memory, or an on-disk
+# SQLite database (see SQLiteStore)
+BACKENDS = ('memory', 'sqlite')
+
+# Format version of the SQLite database; older databases are rebuilt
+SQLITE_VERSION = 1
+
+# Approximate memory the query result cache of a DataProcessor may hold (0 disables it)
+QUERY_CACHE_BYTES = 64 * 1024 * 1024
+
+# SQLite column types of the schema kinds, and the indexes created after a bulk load
+SQL_TYPES = {'category': 'TEXT', 'int': 'INTEGER', 'float': 'REAL'}
+SQLITE_INDEXES = OrderedDict([
+    ('marketing_date', 'marketing (date)'),
+    ('marketing_platform', 'marketing (platform, date)'),
+    ('marketing_campaign', 'marketing (campaign, date)'),
+    ('business_date', 'business (date)'),
+])
+
+class PlatformRegistry:
+    """Ordered marketing platforms and the CSV file each one is loaded from
+    
+    discover() registers every platform CSV of a data directory, so a new channel only
+    needs its file; nothing else names platforms.
+    """
+    def __init__(self, platforms=()):
+        # platform -> CSV filename, in registration order
+        self.files = OrderedDict(platforms)
+    
+    def names(self):
+        return list(self.files)
+    
+    def filenames(self):
+        return list(self.files.values())
+    
+    @staticmethod
+    def platform_name(filename):
+        """Name a platform file: the built-in name for its file, else its title-cased stem"""
+        for name, builtin in MARKETING_PLATFORMS.items():
+            if builtin == filename:
+                return name
+        return os.path.splitext(filename)[0].title()
+    
+    @classmethod
+    def discover(cls, data_dir):
+        """Register the CSVs in data_dir whose header has the marketing columns
+        
+        business.csv is never a platform. Built-in platforms come first in their usual
+        order, then the others by filename.
+        """
+        required = {name for name, _ in MARKETING_SCHEMA if name != 'platform'}
+        found = []
+        for entry in os.scandir(data_dir):
+            if not entry.is_file() or not entry.name.endswith('.csv') or entry.name == "business.csv":
+                continue
+            with open(entry.path, 'r', encoding='utf-8', newline='') as file:
+                header = next(csv.reader(file), [])
+            if required.issubset(header):
+                found.append(entry.name)
+        builtins = list(MARKETING_PLATFORMS.values())
+        found.sort(key=lambda filename: (builtins.index(filename) if filename in builtins else len(builtins), filename))
+        return cls((cls.platform_name(filename), filename) for filename in found)
+
+class CategoryColumn:
+    """Dictionary-encoded string column: integer codes into a list of distinct values"""
+    def __init__(self):
+        self.codes = array('I')
+        self.values = []
+        self.lookup = {}
+        
+    def encode(self, value):
+        """Return the code for value, adding it to the dictionary if unseen"""
+        code = self.lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self.lookup[value] = code
+            self.values.append(value)
+        return code
+    
+    def extend(self, values):
+        """Append an iterable of string values"""
+        lookup = self.lookup
+        encode = self.encode
+        self.codes.extend(lookup[value] if value in lookup else encode(value) for value in values)
+    
+    def __len__(self):
+        return len(self.codes)
+    
+    def __getitem__(self, index):
+        return self.values[self.codes[index]]
+    
+    def __iter__(self):
+        return map(self.values.__getitem__, self.codes)
+
+class ColumnTable:
+    """Typed column-oriented table, parsed once from CSV"""
+    def __init__(self, schema):
+        self.schema = schema
+        # Name of the category column the rows are ordered by, if any
+        self.sort_key = None
+        self.columns = OrderedDict()
+        for name, kind in schema:
+            if kind == 'category':
+                self.columns[name] = CategoryColumn()
+            elif kind == 'int':
+                self.columns[name] = array('q')
+            else:
+                self.columns[name] = array('d')
+                
+    def __len__(self):
+        return len(self.columns[self.schema[0][0]])
+    
+    def __getitem__(self, name):
+        return self.columns[name]
+    
+    def load_csv(self, filepath, constants=None):
+        """Append every row of a CSV file; constants fill columns the file does not have"""
+        with open(filepath, 'r', encoding='utf-8', newline='') as file:
+            reader = csv.reader(file)
+            header = next(reader)
+            return self.extend_rows(header, reader, constants)
+    
+    def extend_rows(self, header, rows, constants=None):
+        """Append rows of field values laid out as in header and return the number added"""
+        constants = constants or {}
+        start = len(self)
+        positions = [(name, kind, header.index(name))
+                     for name, kind in self.schema if name not in constants]
+        rows = iter(rows)
+        while True:
+            batch = [row for _, row in zip(range(CSV_BATCH_SIZE), rows) if row]
+            if not batch:
+                break
+            fields = list(zip(*batch))
+            for name, kind, position in positions:
+                if kind == 'int':
+                    self.columns[name].extend(map(int, fields[position]))
+                elif kind == 'float':
+                    self.columns[name].extend(map(float, fields[position]))
+                else:
+                    self.columns[name].extend(fields[position])
+        added = len(self.columns[positions[0][0]]) - start
+        for name, value in constants.items():
+            column = self.columns[name]
+            if isinstance(column, CategoryColumn):
+                column.codes.extend(repeat(column.encode(value), added))
+            else:
+                column.extend(repeat(value, added))
+        return added
+    
+    def dump(self, file):
+        """Write the raw column bytes to a binary file and return their layout for from_buffer()"""
+        layout = []
+        for name, kind in self.schema:
+            column = self.columns[name]
+            data = column.codes if kind == 'category' else column
+            data = memoryview(data)
+            # Keep every column aligned for the memoryview cast on load
+            file.write(b'\0' * (-file.tell() % 8))
+            entry = {
+                'name': name,
+                'offset': file.tell(),
+                'length': len(data),
+                'typecode': data.format,
+                'itemsize': data.itemsize
+            }
+            if kind == 'category':
+                entry['values'] = column.values
+            file.write(data)
+            layout.append(entry)
+        return layout
+    
+    @classmethod
+    def from_buffer(cls, schema, layout, buffer):
+        """Build a read-only table whose columns are zero-copy views into buffer"""
+        table = cls(schema)
+        view = memoryview(buffer)
+        for entry in layout:
+            start = entry['offset']
+            data = view[start:start + entry['length'] * entry['itemsize']].cast(entry['typecode'])
+            column = table.columns[entry['name']]
+            if isinstance(column, CategoryColumn):
+                column.codes = data
+                column.values = entry['values']
+                column.lookup = {value: code for code, value in enumerate(column.values)}
+            else:
+                table.columns[entry['name']] = data
+        return table
+    
+    def take(self, indices):
+        """Return a new table of the given rows; category columns share this table's dictionaries"""
+        table = ColumnTable(self.schema)
+        for name, kind in self.schema:
+            column = self.columns[name]
+            if kind == 'category':
+                taken = table.columns[name]
+                taken.values = column.values
+                taken.lookup = column.lookup
+                taken.codes = array('I', map(column.codes.__getitem__, indices))
+            else:
+                table.columns[name] = array('q' if kind == 'int' else 'd', map(column.__getitem__, indices))
+        return table
+    
+    def append(self, other):
+        """Append every row of a table with the same schema, re-encoding its category values"""
+        for name, kind in self.schema:
+            column = self.columns[name]
+            source = other.columns[name]
+            if kind == 'category':
+                codes = [column.encode(value) for value in source.values]
+                column.codes.extend(map(codes.__getitem__, source.codes))
+            else:
+                column.frombytes(memoryview(source).cast('B'))
+    
+    def postings(self, name):
+        """Return, for each code of a category column, the ascending indexes of its rows"""
+        column = self.columns[name]
+        postings = [array('I') for _ in column.values]
+        appends = [posting.append for posting in postings]
+        for row, code in enumerate(column.codes):
+            appends[code](row)
+        return postings
+    
+    def sort_by(self, name):
+        """Return a copy of the table with rows stably ordered by a category column's values"""
+        values = self.columns[name].values
+        postings = self.postings(name)
+        order = array('I')
+        for code in sorted(range(len(values)), key=values.__getitem__):
+            order.extend(postings[code])
+        table = self.take(order)
+        table.sort_key = name
+        return table
+    
+    def row(self, index):
+        """Return one row as a dictionary of typed values"""
+        return {name: self.columns[name][index] for name, _ in self.schema}
+    
+    def rows(self):
+        """Yield every row as a dictionary of typed values"""
+        names = [name for name, _ in self.schema]
+        for values in zip(*(self.columns[name] for name in names)):
+            yield dict(zip(names, values))
+
+class RowsView:
+    """Read-only sequence of a ColumnTable's rows as dictionaries
+    
+    Nothing is copied up front: each row dictionary is built when it is read, so
+    iterating a view costs no more memory than one row.
+    """
+    def __init__(self, table):
+        self.table = table
+    
+    def __len__(self):
+        return len(self.table)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.table.row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+        return self.table.row(index)
+    
+    def __iter__(self):
+        return self.table.rows()
+
+class StoreRowsView:
+    """Read-only sequence of the SQLite store's marketing rows, queried as they are read
+    
+    Same contract as RowsView; indexing and slicing read just the requested rows.
+    """
+    def __init__(self, store):
+        self.store = store
+    
+    def __len__(self):
+        return self.store.count()
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return list(self.store.rows(start, max(stop - start, 0)))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+        return next(self.store.rows(index, 1))
+    
+    def __iter__(self):
+        return self.store.rows()
+
+def iter_row_tables(header, rows, schema, constants=None, batch_size=CSV_BATCH_SIZE):
+    """Group parsed CSV rows into a sequence of ColumnTables of at most batch_size rows"""
+    rows = (row for row in rows if row)
+    while True:
+        table = ColumnTable(schema)
+        if not table.extend_rows(header, islice(rows, batch_size), constants):
+            break
+        yield table
+
+def iter_csv_tables(filepath, schema, constants=None, batch_size=CSV_BATCH_SIZE):
+    """Stream a CSV file as a sequence of ColumnTables of at most batch_size rows"""
+    with open(filepath, 'r', encoding='utf-8', newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        yield from iter_row_tables(header, reader, schema, constants, batch_size)
+
+def split_csv(filepath, chunk_bytes=PARALLEL_CHUNK_BYTES):
+    """Split the data lines of a CSV file into (start, end) byte ranges of about chunk_bytes"""
+    size = os.path.getsize(filepath)
+    ranges = []
+    with open(filepath, 'rb') as file:
+        start = len(file.readline())
+        while start < size:
+            # Extend each range to the end of the line it would otherwise cut
+            file.seek(min(start + chunk_bytes, size))
+            file.readline()
+            end = min(file.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+def _iter_csv_range(filepath, start, end):
+    """Yield the decoded lines of a file that begin within [start, end)"""
+    with open(filepath, 'rb') as file:
+        file.seek(start)
+        position = start
+        for line in file:
+            if position >= end:
+                break
+            position += len(line)
+            yield line.decode('utf-8')
+
+def aggregate_csv_range(filepath, platform, start, end, batch_size=CSV_BATCH_SIZE, sketch_dimensions=()):
+    """Parse and aggregate one byte range of a platform CSV; runs in worker processes
+    
+    Returns the rollups, the number of rows and {dimension: GroupSketches} of the range.
+    """
+    with open(filepath, 'r', encoding='utf-8', newline='') as file:
+        header = next(csv.reader(file))
+    aggregates = MarketingAggregates()
+    sketches = {dimension: GroupSketches(dimension) for dimension in sketch_dimensions}
+    rows = 0
+    for batch in iter_row_tables(header, csv.reader(_iter_csv_range(filepath, start, end)),
+                                 MARKETING_SCHEMA, {'platform': platform}, batch_size):
+        aggregates.add_table(batch)
+        for group_sketches in sketches.values():
+            group_sketches.add_table(batch)
+        rows += len(batch)
+    return aggregates, rows, sketches
+
+def _contains(ascending, value):
+    """Check membership in an ascending sequence by bisection"""
+    index = bisect_left(ascending, value)
+    return index < len(ascending) and ascending[index] == value
+
+def peak_memory_mb():
+    """Return this process's peak resident memory in megabytes, or None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def ratios(numerators, denominators, scale=1):
+    """Element-wise numerators / denominators * scale, 0.0 wherever the denominator is not positive"""
+    if np is not None and len(denominators) >= VECTORIZE_MIN_GROUPS:
+        numerators = np.asarray(numerators, dtype=float)
+        denominators = np.asarray(denominators, dtype=float)
+        result = np.zeros(len(denominators))
+        np.divide(numerators, denominators, out=result, where=denominators > 0)
+        if scale != 1:
+            result *= scale
+        return result
+    return [(n / d) * scale if d > 0 else 0.0 for n, d in zip(numerators, denominators)]
+
+def round_values(values, digits):
+    """Round every value like round(value, digits) and return a list"""
+    if np is not None and len(values) >= VECTORIZE_MIN_GROUPS:
+        values = np.asarray(values, dtype=float)
+        result = np.round(values, digits)
+        # np.round scales in binary floating point, so values within rounding error of a
+        # half-way point can round differently from Python's exact round(); redo those
+        scaled = values * 10.0 ** digits
+        near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) <= 1e-7 * np.maximum(1.0, np.abs(scaled))
+        for index in np.flatnonzero(near_half):
+            result[index] = round(float(values[index]), digits)
+        return result.tolist()
+    return [round(value, digits) for value in values]
+
+def derive_metrics(impressions, clicks, spend, attributed_revenue):
+    """Return rounded spend/revenue and CTR, CPC and ROAS columns for per-group totals"""
+    return {
+        'spend': round_values(spend, 2),
+        'attributed_revenue': round_values(attributed_revenue, 2),
+        'ctr': round_values(ratios(clicks, impressions, 100), 3),
+        'cpc': round_values(ratios(spend, clicks), 2),
+        'roas': round_values(ratios(attributed_revenue, spend), 2)
+    }
+
+def group_metrics(labels, totals):
+    """Build result rows from group labels and [impressions, clicks, spend, revenue, ...] totals
+    
+    labels is a list of dicts holding each group's identifying fields, in the same order as totals.
+    """
+    impressions = [group[0] for group in totals]
+    clicks = [group[1] for group in totals]
+    metrics = derive_metrics(impressions, clicks, [group[2] for group in totals], [group[3] for group in totals])
+    keys = ['impressions', 'clicks', 'spend', 'attributed_revenue', 'ctr', 'cpc', 'roas']
+    columns = [impressions, clicks, metrics['spend'], metrics['attributed_revenue'],
+               metrics['ctr'], metrics['cpc'], metrics['roas']]
+    result = []
+    for label, values in zip(labels, zip(*columns)):
+        row = dict(label)
+        row.update(zip(keys, values))
+        result.append(row)
+    return result
+
+def period_start(date, period):
+    """Return the first day (YYYY-MM-DD) of the week, month or quarter holding date; weeks start on Monday"""
+    if period == 'week':
+        day = datetime.strptime(date, '%Y-%m-%d').date()
+        return (day - timedelta(days=day.weekday())).isoformat()
+    if period == 'month':
+        return date[:8] + '01'
+    if period == 'quarter':
+        month = (int(date[5:7]) - 1) // 3 * 3 + 1
+        return f'{date[:4]}-{month:02d}-01'
+    raise ValueError(f"unknown period: {period} (expected one of: {', '.join(PERIOD_BUCKETS)})")
+
+def write_file_atomic(path, body):
+    """Replace path with body so readers see either the old or the new file, never a partial one"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+def write_precompressed(path, body):
+    """Write body to path plus gzip (and brotli, if installed) variants for the web server
+    
+    Variants are written after the plain file so they are never older than it; the server
+    only serves a variant whose mtime is not older than the plain file's.
+    """
+    write_file_atomic(path, body)
+    write_file_atomic(path + ".gz", gzip.compress(body, compresslevel=9, mtime=0))
+    if brotli is not None:
+        write_file_atomic(path + ".br", brotli.compress(body))
+    elif os.path.exists(path + ".br"):
+        os.remove(path + ".br")
+
+def encode_json(data, encoder='compact'):
+    """Serialize data to UTF-8 JSON bytes with one of JSON_ENCODERS
+    
+    'indent' is the readable two-space layout, 'compact' drops optional whitespace and
+    'orjson' is compact JSON from orjson when installed (from the json module otherwise).
+    """
+    if encoder == 'orjson' and orjson is not None:
+        return orjson.dumps(data)
+    if encoder == 'indent':
+        return json.dumps(data, indent=2).encode('utf-8')
+    if encoder in ('compact', 'orjson'):
+        return json.dumps(data, separators=COMPACT_SEPARATORS).encode('utf-8')
+    raise ValueError(f"unknown encoder: {encoder} (expected one of: {', '.join(JSON_ENCODERS)})")
+
+def to_columnar(data):
+    """Return data with every list of dicts replaced by a dict of column lists
+    
+    Keys are not repeated per row: [{'a': 1, 'b': 2}, {'a': 3, 'b': 4}] becomes
+    {'a': [1, 3], 'b': [2, 4]}. A row missing a key gets None in that column.
+    """
+    if isinstance(data, dict):
+        return {key: to_columnar(value) for key, value in data.items()}
+    if isinstance(data, list) and data and all(isinstance(row, dict) for row in data):
+        keys = list(OrderedDict.fromkeys(key for row in data for key in row))
+        return {key: [row.get(key) for row in data] for key in keys}
+    return data
+
+def remove_stale_files(directory, keep):
+    """Delete files in directory (and their .gz/.br variants) whose names are not in keep"""
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        base = name[:-3] if name.endswith(('.gz', '.br')) else name
+        if base not in keep:
+            os.remove(os.path.join(directory, name))
+
+class TableIndex:
+    """Posting lists and date offsets of a ColumnTable, built on first use, for select()"""
+    def __init__(self, table):
+        self.table = table
+        self.postings = {}
+        self.date_offsets = None
+    
+    def build(self):
+        """Build every index select() may use up front"""
+        if self.table.sort_key == 'date':
+            self._date_offsets()
+        else:
+            self._posting_lists('date')
+        for dimension in FILTER_DIMENSIONS:
+            self._posting_lists(dimension)
+    
+    def _posting_lists(self, dimension):
+        """Return the row indexes for each code of a dimension"""
+        if dimension not in self.postings:
+            self.postings[dimension] = self.table.postings(dimension)
+        return self.postings[dimension]
+    
+    def _date_offsets(self):
+        """Return the sorted dates of the date-ordered table and each date's first row"""
+        if self.date_offsets is None:
+            values = self.table['date'].values
+            counts = Counter(self.table['date'].codes)
+            dates = sorted((values[code], count) for code, count in counts.items())
+            starts = [0]
+            for _, count in dates:
+                starts.append(starts[-1] + count)
+            self.date_offsets = ([date for date, _ in dates], starts)
+        return self.date_offsets
+    
+    def _date_row_range(self, start_date, end_date):
+        """Return the [start, end) rows of the date-ordered table within the dates"""
+        dates, starts = self._date_offsets()
+        first = bisect_left(dates, start_date) if start_date else 0
+        last = bisect_right(dates, end_date) if end_date else len(dates)
+        return starts[first], starts[max(first, last)]
+    
+    def _rows_for_codes(self, dimension, codes, start_row=0, end_row=None):
+        """Return the ascending row indexes within [start_row, end_row) whose dimension has one of codes"""
+        postings = self._posting_lists(dimension)
+        if end_row is None:
+            end_row = len(self.table)
+        # Posting lists are ascending, so the row range is found by bisection
+        slices = [postings[code][bisect_left(postings[code], start_row):bisect_left(postings[code], end_row)]
+                  for code in codes]
+        if len(slices) == 1:
+            return slices[0]
+        return sorted(chain.from_iterable(slices))
+    
+    def select(self, filters):
+        """Return ascending row indexes matching filters, looked up from the indexes
+        
+        filters may hold 'start_date'/'end_date' (inclusive, YYYY-MM-DD) and lists of
+        accepted values for each of FILTER_DIMENSIONS. The date range narrows a date-ordered
+        table to a row range; dimension posting lists are cut to that range and intersected,
+        so the cost follows the size of the slice. Returns None when nothing is filtered.
+        """
+        candidates = []
+        start_row, end_row = 0, len(self.table)
+        start_date = filters.get('start_date')
+        end_date = filters.get('end_date')
+        date_filtered = bool(start_date or end_date)
+        if date_filtered:
+            if self.table.sort_key == 'date':
+                start_row, end_row = self._date_row_range(start_date, end_date)
+            else:
+                codes = [code for code, date in enumerate(self.table['date'].values)
+                         if (not start_date or date >= start_date) and (not end_date or date <= end_date)]
+                candidates.append(self._rows_for_codes('date', codes))
+        for dimension in FILTER_DIMENSIONS:
+            values = filters.get(dimension)
+            if values:
+                lookup = self.table[dimension].lookup
+                codes = [lookup[value] for value in values if value in lookup]
+                candidates.append(self._rows_for_codes(dimension, codes, start_row, end_row))
+        if not candidates:
+            return range(start_row, end_row) if date_filtered else None
+        
+        # Walk the most selective list and probe the others by bisection
+        candidates.sort(key=len)
+        rows, others = candidates[0], candidates[1:]
+        if others:
+            rows = [row for row in rows if all(_contains(other, row) for other in others)]
+        return rows
+
+class MarketingAggregates:
+    """Additive daily, platform and campaign rollups of marketing rows"""
+    def __init__(self):
+        # Platforms in the order of their position in the per-day arrays
+        self.platform_names = []
+        self.platform_index = {}
+        # date -> [impressions, clicks, spend, revenue, spend per platform, revenue per platform]
+        self.daily = {}
+        # platform -> [impressions, clicks, spend, revenue, set of campaigns]
+        self.platforms = {}
+        # campaign -> [impressions, clicks, spend, revenue, last platform seen]
+        self.campaigns = {}
+        
+    def platform_position(self, platform):
+        """Return a platform's index in the per-day arrays, adding a zero slot to every day if new"""
+        position = self.platform_index.get(platform)
+        if position is None:
+            position = self.platform_index[platform] = len(self.platform_names)
+            self.platform_names.append(platform)
+            for entry in self.daily.values():
+                entry[4].append(0.0)
+                entry[5].append(0.0)
+        return position
+    
+    def day(self, date):
+        """Return the totals of date, created with zeros for every platform if missing"""
+        entry = self.daily.get(date)
+        if entry is None:
+            count = len(self.platform_names)
+            entry = self.daily[date] = [0, 0, 0.0, 0.0, [0.0] * count, [0.0] * count]
+        return entry
+    
+    def add_table(self, table):
+        """Fold every row of a marketing ColumnTable into the rollups in one scan"""
+        dates = table['date'].values
+        platforms = table['platform'].values
+        campaigns = table['campaign'].values
+        
+        # Accumulate by category code first; only dates present in the table get totals
+        present_dates = set(table['date'].codes)
+        daily = {code: [0, 0, 0.0, 0.0] for code in present_dates}
+        daily_platform = {code: [[0.0, 0.0] for _ in platforms] for code in present_dates}
+        platform_totals = [[0, 0, 0.0, 0.0, set()] for _ in platforms]
+        campaign_totals = [[0, 0, 0.0, 0.0, None] for _ in campaigns]
+        
+        for date, platform, campaign, impressions, clicks, spend, revenue in zip(
+                table['date'].codes, table['platform'].codes, table['campaign'].codes,
+                table['impressions'], table['clicks'], table['spend'], table['attributed_revenue']):
+            totals = daily[date]
+            totals[0] += impressions
+            totals[1] += clicks
+            totals[2] += spend
+            totals[3] += revenue
+            totals = daily_platform[date][platform]
+            totals[0] += spend
+            totals[1] += revenue
+            totals = platform_totals[platform]
+            totals[0] += impressions
+            totals[1] += clicks
+            totals[2] += spend
+            totals[3] += revenue
+            totals[4].add(campaign)
+            totals = campaign_totals[campaign]
+            totals[0] += impressions
+            totals[1] += clicks
+            totals[2] += spend
+            totals[3] += revenue
+            totals[4] = platform
+        
+        # Fold the code-indexed totals into the name-keyed rollups
+        positions = [(code, self.platform_position(platform))
+                     for code, (platform, totals) in enumerate(zip(platforms, platform_totals)) if totals[4]]
+        for code, totals in daily.items():
+            entry = self.day(dates[code])
+            self._add_totals(entry, totals)
+            by_platform = daily_platform[code]
+            for platform, position in positions:
+                entry[4][position] += by_platform[platform][0]
+                entry[5][position] += by_platform[platform][1]
+        for platform, totals in zip(platforms, platform_totals):
+            if totals[4]:
+                entry = self.platforms.setdefault(platform, [0, 0, 0.0, 0.0, set()])
+                self._add_totals(entry, totals)
+                entry[4].update(campaigns[code] for code in totals[4])
+        for campaign, totals in zip(campaigns, campaign_totals):
+            if totals[4] is not None:
+                entry = self.campaigns.setdefault(campaign, [0, 0, 0.0, 0.0, None])
+                self._add_totals(entry, totals)
+                entry[4] = platforms[totals[4]]
+        
+    def merge(self, other):
+        """Add another MarketingAggregates into this one"""
+        positions = [(theirs, self.platform_position(platform)) for theirs, platform in enumerate(other.platform_names)]
+        for date, totals in other.daily.items():
+            entry = self.day(date)
+            self._add_totals(entry, totals)
+            for theirs, ours in positions:
+                entry[4][ours] += totals[4][theirs]
+                entry[5][ours] += totals[5][theirs]
+        for platform, totals in other.platforms.items():
+            entry = self.platforms.setdefault(platform, [0, 0, 0.0, 0.0, set()])
+            self._add_totals(entry, totals)
+            entry[4].update(totals[4])
+        for campaign, totals in other.campaigns.items():
+            entry = self.campaigns.setdefault(campaign, [0, 0, 0.0, 0.0, None])
+            self._add_totals(entry, totals)
+            entry[4] = totals[4]
+        
+    def platform_series(self, platform, dates, measure):
+        """Return a platform's per-day spend (measure 0) or revenue (1) for dates, zeros if unseen"""
+        position = self.platform_index.get(platform)
+        if position is None:
+            return [0.0] * len(dates)
+        daily = self.daily
+        return [daily[date][4 + measure][position] for date in dates]
+    
+    def to_state(self):
+        """Return the rollups as JSON-serializable data"""
+        return {
+            'platform_names': self.platform_names,
+            'daily': self.daily,
+            'platforms': {platform: totals[:4] + [sorted(totals[4])]
+                          for platform, totals in self.platforms.items()},
+            'campaigns': self.campaigns
+        }
+    
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild rollups saved with to_state()"""
+        aggregates = cls()
+        for platform in state['platform_names']:
+            aggregates.platform_position(platform)
+        aggregates.daily = state['daily']
+        aggregates.platforms = {platform: totals[:4] + [set(totals[4])]
+                                for platform, totals in state['platforms'].items()}
+        aggregates.campaigns = state['campaigns']
+        return aggregates
+    
+    @staticmethod
+    def _add_totals(entry, totals):
+        entry[0] += totals[0]
+        entry[1] += totals[1]
+        entry[2] += totals[2]
+        entry[3] += totals[3]
+
+def check_rollup_dimensions(dimensions):
+    """Return dimensions as a list, raising ValueError if any is not in CUBE_DIMENSIONS"""
+    dimensions = list(dimensions)
+    unknown = [dimension for dimension in dimensions if dimension not in CUBE_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"unknown rollup dimension(s): {', '.join(unknown)}")
+    return dimensions
+
+def sort_rollup(result, dimensions):
+    """Order rollup groups by date when grouped by date and by spend otherwise"""
+    if 'date' in dimensions:
+        return sorted(result, key=lambda x: tuple(x[dimension] for dimension in dimensions))
+    return sorted(result, key=lambda x: x['spend'], reverse=True)
+
+class RollupCube:
+    """Additive measures summed at the finest grain, date x platform x campaign x state x tactic
+    
+    Any coarser grouping is rolled up from the cube's cells rather than from raw rows;
+    ratios (CTR, CPC, ROAS) are only derived when a rollup is read.
+    """
+    def __init__(self, table):
+        cells = {}
+        for key, impressions, clicks, spend, revenue in zip(
+                zip(*(table[name].codes for name in CUBE_DIMENSIONS)),
+                table['impressions'], table['clicks'], table['spend'], table['attributed_revenue']):
+            totals = cells.get(key)
+            if totals is None:
+                cells[key] = [impressions, clicks, spend, revenue]
+            else:
+                totals[0] += impressions
+                totals[1] += clicks
+                totals[2] += spend
+                totals[3] += revenue
+        
+        # Cells are stored column-wise, sharing the source table's dictionaries
+        self.cells = ColumnTable(table.schema)
+        for name in CUBE_DIMENSIONS:
+            column = self.cells[name]
+            column.values = table[name].values
+            column.lookup = table[name].lookup
+        for position, name in enumerate(CUBE_DIMENSIONS):
+            self.cells[name].codes.extend(key[position] for key in cells)
+        for position, name in enumerate(ADDITIVE_MEASURES):
+            self.cells[name].extend(totals[position] for totals in cells.values())
+        # Date-ordered cells let filtered rollups visit only the matching cells. Cells are
+        # created in row order, so those of a date-ordered table already are.
+        if table.sort_key == 'date':
+            self.cells.sort_key = 'date'
+        else:
+            self.cells = self.cells.sort_by('date')
+        self.index = TableIndex(self.cells)
+    
+    def __len__(self):
+        return len(self.cells)
+    
+    def rollup(self, dimensions, filters=None):
+        """Group the cube by a subset of CUBE_DIMENSIONS, optionally filtered like select_rows
+        
+        Returns one dict per group with the dimension values, summed measures and the derived
+        ratios, ordered by date when grouped by date and by spend otherwise. Filters are looked
+        up in the cells' own TableIndex, so only the matching cells are visited.
+        """
+        dimensions = check_rollup_dimensions(dimensions)
+        selected = self.index.select(filters) if filters else None
+        cells = self.cells if selected is None else self.cells.take(selected)
+        
+        groups = {}
+        keys = zip(*(cells[name].codes for name in dimensions)) if dimensions else repeat((), len(cells))
+        for group, impressions, clicks, spend, revenue in zip(
+                keys,
+                cells['impressions'], cells['clicks'], cells['spend'], cells['attributed_revenue']):
+            totals = groups.get(group)
+            if totals is None:
+                groups[group] = [impressions, clicks, spend, revenue]
+            else:
+                totals[0] += impressions
+                totals[1] += clicks
+                totals[2] += spend
+                totals[3] += revenue
+        
+        dictionaries = [self.cells[dimension].values for dimension in dimensions]
+        labels = ({dimension: values[code] for dimension, values, code in zip(dimensions, dictionaries, group)}
+                  for group in groups)
+        return sort_rollup(group_metrics(labels, list(groups.values())), dimensions)
+
+def sketch_hash(value):
+    """64-bit hash of a dimension value, stable across processes and runs unlike hash()"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+class HyperLogLog:
+    """Fixed-size, mergeable estimate of the number of distinct values added
+    
+    Uses 2 ** precision one-byte registers; the standard error is about
+    1.04 / sqrt(2 ** precision).
+    """
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+    
+    def position(self, value_hash):
+        """Return the register a 64-bit sketch_hash updates and the rank it records"""
+        bits = 64 - self.precision
+        return value_hash >> bits, bits - (value_hash & ((1 << bits) - 1)).bit_length() + 1
+    
+    def add_hash(self, value_hash):
+        """Add a value given its 64-bit sketch_hash"""
+        index, rank = self.position(value_hash)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def add_positions(self, indexes, ranks):
+        """Add values given NumPy arrays of their position() registers and ranks"""
+        np.maximum.at(np.frombuffer(self.registers, dtype=np.uint8), indexes, ranks)
+    
+    def add(self, value):
+        self.add_hash(sketch_hash(value))
+    
+    def merge(self, other):
+        """Fold another sketch of the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLog sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+    
+    def estimate(self):
+        """Return the estimated number of distinct values"""
+        m = len(self.registers)
+        if np is not None:
+            total = float(np.exp2(-np.frombuffer(self.registers, dtype=np.uint8).astype(float)).sum())
+        else:
+            total = sum(2.0 ** -rank for rank in self.registers)
+        estimate = (0.7213 / (1 + 1.079 / m)) * m * m / total
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return estimate
+    
+    def to_state(self):
+        return {'precision': self.precision, 'registers': self.registers.hex()}
+    
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['precision'])
+        sketch.registers = bytearray.fromhex(state['registers'])
+        return sketch
+
+class QuantileSketch:
+    """Mergeable quantile sketch with relative error guarantees (a DDSketch)
+    
+    Positive values are counted in logarithmic bins, so every quantile is returned within
+    relative_accuracy of a true value; zero and negative values share one bin. When more
+    than max_bins bins are in use the lowest ones are collapsed, keeping memory fixed.
+    """
+    def __init__(self, relative_accuracy=QUANTILE_ACCURACY, max_bins=QUANTILE_MAX_BINS):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins = Counter()
+        self.zeros = 0
+        self.count = 0
+    
+    def key(self, value):
+        """Return the bin of a positive value"""
+        return math.ceil(math.log(value) / self.log_gamma)
+    
+    def add_bins(self, bins, zeros=0):
+        """Add counts per bin key (see key()) and a count of non-positive values"""
+        self.bins.update(bins)
+        self.zeros += zeros
+        self.count += zeros + sum(bins.values())
+        if len(self.bins) > self.max_bins:
+            keys = sorted(self.bins)
+            collapsed = keys[-self.max_bins]
+            for key in keys[:-self.max_bins]:
+                self.bins[collapsed] += self.bins.pop(key)
+    
+    def add(self, value):
+        if value > 0:
+            self.add_bins({self.key(value): 1})
+        else:
+            self.add_bins({}, 1)
+    
+    def merge(self, other):
+        """Fold another sketch with the same relative accuracy into this one"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("cannot merge quantile sketches of different accuracy")
+        self.add_bins(other.bins, other.zeros)
+    
+    def quantiles(self, qs):
+        """Return the estimated q-quantile (0 <= q <= 1) for each of ascending qs, None when empty"""
+        if not self.count:
+            return [None] * len(qs)
+        result = []
+        bins = sorted(self.bins.items())
+        position = 0
+        seen = self.zeros
+        value = 0.0
+        for q in qs:
+            rank = q * (self.count - 1)
+            while rank >= seen and position < len(bins):
+                key, count = bins[position]
+                seen += count
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                position += 1
+            result.append(value)
+        return result
+    
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+    
+    def to_state(self):
+        return {'relative_accuracy': self.relative_accuracy, 'max_bins': self.max_bins,
+                'zeros': self.zeros, 'bins': sorted(self.bins.items())}
+    
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['relative_accuracy'], state['max_bins'])
+        sketch.add_bins(dict(state['bins']), state['zeros'])
+        return sketch
+
+def _bin_counts(groups, values, log_gamma):
+    """Count quantile sketch bins per group: {group: (Counter of bin keys, non-positive count)}"""
+    if np is not None and len(values) >= VECTORIZE_MIN_GROUPS:
+        groups = np.asarray(groups, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+        positive = values > 0
+        keys = np.zeros(len(values), dtype=np.int64)
+        keys[positive] = np.ceil(np.log(values[positive]) / log_gamma)
+        # One sortable int64 per (group, key); keys stay far below 2 ** 20 in magnitude and
+        # non-positive values get key 0, sorting before every bin of their group
+        combined = np.sort((groups << 21) + np.where(positive, keys + (1 << 20), 0))
+        starts = np.flatnonzero(np.concatenate(([True], combined[1:] != combined[:-1])))
+        counts = np.diff(np.append(starts, len(combined))).tolist()
+        pairs = combined[starts]
+        pair_groups = (pairs >> 21).tolist()
+        keys = ((pairs & ((1 << 21) - 1)) - (1 << 20)).tolist()
+        bounds = (np.flatnonzero(np.diff(pairs >> 21)) + 1).tolist()
+        result = {}
+        for start, end in zip([0] + bounds, bounds + [len(keys)]):
+            group = pair_groups[start]
+            zeros = 0
+            if keys[start] == -(1 << 20):
+                zeros = counts[start]
+                start += 1
+            result[group] = (Counter(dict(zip(keys[start:end], counts[start:end]))), zeros)
+        return result
+    
+    result = {}
+    for (group, key), count in Counter(
+            (group, math.ceil(math.log(value) / log_gamma) if value > 0 else None)
+            for group, value in zip(groups, values)).items():
+        bins, zeros = result.setdefault(group, (Counter(), 0))
+        if key is None:
+            result[group] = (bins, count)
+        else:
+            bins[key] = count
+    return result
+
+class GroupSketches:
+    """Fixed-size sketches of marketing rows per value of one dimension
+    
+    Each group keeps a HyperLogLog of its distinct values of every SKETCH_DIMENSIONS
+    dimension and quantile sketches of per-row spend and CPC. Sketches of different
+    row sets (worker partitions, incremental runs) merge exactly into those of their union.
+    With dimension None all rows form a single group.
+    """
+    def __init__(self, dimension=None):
+        self.dimension = dimension
+        # group value -> [rows, {dimension: HyperLogLog}, spend QuantileSketch, CPC QuantileSketch]
+        self.groups = {}
+    
+    def _group(self, value):
+        entry = self.groups.get(value)
+        if entry is None:
+            entry = self.groups[value] = [0, {dimension: HyperLogLog() for dimension in SKETCH_DIMENSIONS},
+                                          QuantileSketch(), QuantileSketch()]
+        return entry
+    
+    def add_table(self, table):
+        """Fold the rows of a marketing ColumnTable into the sketches"""
+        if not len(table):
+            return
+        if self.dimension is None:
+            codes = [0] * len(table)
+            values = [None]
+        else:
+            codes = table[self.dimension].codes
+            values = table[self.dimension].values
+        if np is not None:
+            codes = np.asarray(codes, dtype=np.int64)
+            counts = dict(enumerate(np.bincount(codes).tolist()))
+        else:
+            counts = Counter(codes)
+        entries = {}
+        for code, count in counts.items():
+            if count:
+                entries[code] = self._group(values[code])
+                entries[code][0] += count
+        
+        # Registers only keep maxima, so each distinct (group, value) pair is added once
+        template = HyperLogLog()
+        for dimension in SKETCH_DIMENSIONS:
+            column = table[dimension]
+            positions = [template.position(sketch_hash(value)) for value in column.values]
+            if np is not None:
+                pairs = np.sort((codes << 32) | np.asarray(column.codes, dtype=np.int64))
+                pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+                pair_codes = pairs >> 32
+                positions = np.array(positions, dtype=np.int64).reshape(-1, 2)[pairs & 0xFFFFFFFF]
+                # Pairs are sorted by group, so each group's registers are updated from one slice
+                bounds = (np.flatnonzero(np.diff(pair_codes)) + 1).tolist()
+                for start, end in zip([0] + bounds, bounds + [len(pairs)]):
+                    entries[int(pair_codes[start])][1][dimension].add_positions(
+                        positions[start:end, 0], positions[start:end, 1].astype(np.uint8))
+            else:
+                for code, value_code in set(zip(codes, column.codes)):
+                    index, rank = positions[value_code]
+                    registers = entries[code][1][dimension].registers
+                    if rank > registers[index]:
+                        registers[index] = rank
+        
+        # CPC is only defined for rows with clicks
+        spend = table['spend']
+        if np is not None:
+            clicks = np.asarray(table['clicks'], dtype=float)
+            clicked = clicks > 0
+            cpc_codes = codes[clicked]
+            cpc = np.asarray(spend)[clicked] / clicks[clicked]
+        else:
+            clicked = [(code, value / clicks) for code, value, clicks in zip(codes, spend, table['clicks']) if clicks > 0]
+            cpc_codes = [code for code, _ in clicked]
+            cpc = [value for _, value in clicked]
+        log_gamma = QuantileSketch().log_gamma
+        for code, (bins, zeros) in _bin_counts(codes, spend, log_gamma).items():
+            entries[code][2].add_bins(bins, zeros)
+        for code, (bins, zeros) in _bin_counts(cpc_codes, cpc, log_gamma).items():
+            entries[code][3].add_bins(bins, zeros)
+    
+    def merge(self, other):
+        """Add the sketches of another GroupSketches over the same dimension"""
+        if other.dimension != self.dimension:
+            raise ValueError(f"cannot merge sketches by {other.dimension} into sketches by {self.dimension}")
+        for value, (rows, distinct, spend, cpc) in other.groups.items():
+            entry = self._group(value)
+            entry[0] += rows
+            for dimension, sketch in distinct.items():
+                entry[1][dimension].merge(sketch)
+            entry[2].merge(spend)
+            entry[3].merge(cpc)
+    
+    def results(self):
+        """Return one dict per group with its row count, distinct count estimates and quantiles"""
+        result = []
+        for value, (rows, distinct, spend, cpc) in sorted(self.groups.items(), key=lambda item: str(item[0])):
+            row = {self.dimension: value} if self.dimension else {}
+            row['rows'] = rows
+            for dimension in SKETCH_DIMENSIONS:
+                row[f'distinct_{dimension}s'] = round(distinct[dimension].estimate())
+            for name, sketch in (('spend', spend), ('cpc', cpc)):
+                for q, estimate in zip(SKETCH_QUANTILES, sketch.quantiles(SKETCH_QUANTILES)):
+                    row[f'{name}_p{round(q * 100)}'] = round(estimate, 2) if estimate is not None else None
+            result.append(row)
+        return result
+    
+    def to_state(self):
+        """Return the sketches as JSON-serializable data"""
+        return {
+            'dimension': self.dimension,
+            'groups': [[value, rows, {dimension: sketch.to_state() for dimension, sketch in distinct.items()},
+                        spend.to_state(), cpc.to_state()]
+                       for value, (rows, distinct, spend, cpc) in self.groups.items()]
+        }
+    
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild sketches saved with to_state()"""
+        sketches = cls(state['dimension'])
+        for value, rows, distinct, spend, cpc in state['groups']:
+            sketches.groups[value] = [rows,
+                                      {dimension: HyperLogLog.from_state(sketch) for dimension, sketch in distinct.items()},
+                                      QuantileSketch.from_state(spend), QuantileSketch.from_state(cpc)]
+        return sketches
+
+class SQLiteStore:
+    """Marketing and business rows kept in an on-disk SQLite database and aggregated in SQL
+    
+    Rows are bulk-loaded from the CSVs with typed columns and indexed on date, platform and
+    campaign; aggregate() and rollup() run GROUP BY queries, so the rows never have to fit
+    in memory. Each thread opens its own connection to the database file.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+    
+    def connection(self):
+        """Return this thread's connection, creating the schema on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._create_schema(connection)
+            self._local.connection = connection
+        return connection
+    
+    def _create_schema(self, connection):
+        """Create the tables, dropping those of an older schema version"""
+        connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        version = connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        with connection:
+            if version is None or int(version[0]) != SQLITE_VERSION:
+                connection.execute("DELETE FROM meta")
+                connection.execute("DROP TABLE IF EXISTS marketing")
+                connection.execute("DROP TABLE IF EXISTS business")
+                connection.execute("INSERT INTO meta VALUES ('version', ?)", (str(SQLITE_VERSION),))
+            for name, schema in (('marketing', MARKETING_SCHEMA), ('business', BUSINESS_SCHEMA)):
+                columns = ', '.join(f"{column} {SQL_TYPES[kind]} NOT NULL" for column, kind in schema)
+                connection.execute(f"CREATE TABLE IF NOT EXISTS {name} ({columns})")
+            self._create_indexes(connection)
+    
+    @staticmethod
+    def _create_indexes(connection):
+        for name, columns in SQLITE_INDEXES.items():
+            connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {columns}")
+    
+    def sources(self):
+        """Return the source signatures saved by the last load, or None"""
+        row = self.connection().execute("SELECT value FROM meta WHERE key = 'sources'").fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def load(self, data_dir, platforms, sources, filenames, batch_size=CSV_BATCH_SIZE):
+        """Replace the rows of the given source files with their current contents
+        
+        platforms is the PlatformRegistry of data_dir; rows of platforms no longer in it are
+        dropped. Runs as one transaction, so readers see either the old or the new rows.
+        When every marketing file is reloaded the indexes are dropped first and rebuilt
+        after the bulk insert. sources (see DataProcessor._source_signatures) is saved for
+        sources().
+        """
+        connection = self.connection()
+        reload_all = all(filename in filenames for filename in platforms.filenames())
+        marketing_columns = [name for name, _ in MARKETING_SCHEMA]
+        insert = (f"INSERT INTO marketing ({', '.join(marketing_columns)}) "
+                  f"VALUES ({', '.join('?' * len(marketing_columns))})")
+        with connection:
+            if reload_all:
+                for name in SQLITE_INDEXES:
+                    if name.startswith('marketing_'):
+                        connection.execute(f"DROP INDEX IF EXISTS {name}")
+                connection.execute("DELETE FROM marketing")
+            else:
+                connection.execute(f"DELETE FROM marketing WHERE platform NOT IN "
+                                   f"({', '.join('?' * len(platforms.files))})", platforms.names())
+            for platform, filename in platforms.files.items():
+                if filename not in filenames:
+                    continue
+                connection.execute("DELETE FROM marketing WHERE platform = ?", (platform,))
+                for table in iter_csv_tables(os.path.join(data_dir, filename), MARKETING_SCHEMA,
+                                             {'platform': platform}, batch_size):
+                    connection.executemany(insert, zip(*(table[name] for name in marketing_columns)))
+            if "business.csv" in filenames:
+                business_columns = [name for name, _ in BUSINESS_SCHEMA]
+                connection.execute("DELETE FROM business")
+                for table in iter_csv_tables(os.path.join(data_dir, "business.csv"), BUSINESS_SCHEMA,
+                                             batch_size=batch_size):
+                    connection.executemany(
+                        f"INSERT INTO business VALUES ({', '.join('?' * len(business_columns))})",
+                        zip(*(table[name] for name in business_columns)))
+            self._create_indexes(connection)
+            connection.execute("INSERT OR REPLACE INTO meta VALUES ('sources', ?)", (json.dumps(sources),))
+        connection.execute("ANALYZE")
+    
+    def business_table(self):
+        """Read the business rows, in file order, into a ColumnTable"""
+        columns = [name for name, _ in BUSINESS_SCHEMA]
+        table = ColumnTable(BUSINESS_SCHEMA)
+        table.extend_rows(columns, self.connection().execute(
+            f"SELECT {', '.join(columns)} FROM business ORDER BY rowid"))
+        return table
+    
+    def count(self):
+        """Return the number of marketing rows"""
+        return self.connection().execute("SELECT COUNT(*) FROM marketing").fetchone()[0]
+    
+    def rows(self, offset=0, limit=-1):
+        """Yield marketing rows as dicts, ordered by date like the in-memory table
+        
+        offset and limit select a range of that order (a negative limit reads to the end).
+        """
+        columns = [name for name, _ in MARKETING_SCHEMA]
+        cursor = self.connection().execute(f"SELECT {', '.join(columns)} FROM marketing ORDER BY date, rowid "
+                                           "LIMIT ? OFFSET ?", (limit, offset))
+        for values in cursor:
+            yield dict(zip(columns, values))
+    
+    def iter_tables(self, filters=None, batch_size=CSV_BATCH_SIZE):
+        """Yield the marketing rows matching filters as ColumnTable batches"""
+        columns = [name for name, _ in MARKETING_SCHEMA]
+        where, params = self._where(filters or {})
+        cursor = self.connection().execute(f"SELECT {', '.join(columns)} FROM marketing{where}", params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            table = ColumnTable(MARKETING_SCHEMA)
+            table.extend_rows(columns, rows)
+            yield table
+    
+    def _where(self, filters):
+        """Translate select_rows filters into a WHERE clause and its parameters"""
+        clauses = []
+        params = []
+        if filters.get('start_date'):
+            clauses.append("date >= ?")
+            params.append(filters['start_date'])
+        if filters.get('end_date'):
+            clauses.append("date <= ?")
+            params.append(filters['end_date'])
+        for dimension in FILTER_DIMENSIONS:
+            values = filters.get(dimension)
+            if values:
+                clauses.append(f"{dimension} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+    
+    def aggregate(self, filters=None):
+        """Build MarketingAggregates from GROUP BY queries over the rows matching filters"""
+        where, params = self._where(filters or {})
+        connection = self.connection()
+        aggregates = MarketingAggregates()
+        measures = ', '.join(f"SUM({name})" for name in ADDITIVE_MEASURES)
+        
+        for date, platform, *totals in connection.execute(
+                f"SELECT date, platform, {measures} FROM marketing{where} GROUP BY date, platform", params):
+            position = aggregates.platform_position(platform)
+            entry = aggregates.day(date)
+            MarketingAggregates._add_totals(entry, totals)
+            entry[4][position] = totals[2]
+            entry[5][position] = totals[3]
+            platform_entry = aggregates.platforms.get(platform)
+            if platform_entry is None:
+                platform_entry = aggregates.platforms[platform] = [0, 0, 0.0, 0.0, set()]
+            MarketingAggregates._add_totals(platform_entry, totals)
+        
+        # Campaigns come in order of first appearance and take the platform of their last row in
+        # (date, rowid) order, as in the date-sorted table; dates are fixed-width, so the pair
+        # compares as one string
+        last_rows = {}
+        for platform, campaign, _, last_row, *totals in connection.execute(
+                f"SELECT platform, campaign, MIN(rowid) AS first_row, MAX(date || printf('%020d', rowid)), "
+                f"{measures} "
+                f"FROM marketing{where} GROUP BY platform, campaign ORDER BY first_row", params):
+            aggregates.platforms[platform][4].add(campaign)
+            entry = aggregates.campaigns.get(campaign)
+            if entry is None:
+                entry = aggregates.campaigns[campaign] = [0, 0, 0.0, 0.0, platform]
+            MarketingAggregates._add_totals(entry, totals)
+            if last_row > last_rows.get(campaign, ''):
+                last_rows[campaign] = last_row
+                entry[4] = platform
+        return aggregates
+    
+    def rollup(self, dimensions, filters=None):
+        """Group the rows by a subset of CUBE_DIMENSIONS in SQL, like RollupCube.rollup"""
+        dimensions = check_rollup_dimensions(dimensions)
+        where, params = self._where(filters or {})
+        measures = ', '.join(f"SUM({name})" for name in ADDITIVE_MEASURES)
+        group_by = f" GROUP BY {', '.join(dimensions)}" if dimensions else ""
+        cursor = self.connection().execute(
+            f"SELECT {''.join(name + ', ' for name in dimensions)}{measures} "
+            f"FROM marketing{where}{group_by}", params)
+        labels = []
+        totals = []
+        for values in cursor:
+            if values[len(dimensions)] is None:
+                # Without dimensions an empty selection still returns one row of NULL sums
+                continue
+            labels.append(dict(zip(dimensions, values)))
+            totals.append(list(values[len(dimensions):]))
+        return sort_rollup(group_metrics(labels, totals), dimensions)
+
+class StageProfiler:
+    """Wall time, rows and peak memory of every DataProcessor call decorated with @profiled
+    
+    Calls made inside another profiled call get a higher depth and are excluded from the
+    caller's self_seconds. Meant for single-threaded command line runs.
+    """
+    def __init__(self):
+        self.records = []
+        self._open = []
+        self._started = time.perf_counter()
+    
+    def enter(self, stage):
+        record = {'stage': stage, 'depth': len(self._open), 'seconds': None, 'self_seconds': None,
+                  'rows': None, 'rows_per_sec': None, 'peak_memory_mb': None}
+        self.records.append(record)
+        self._open.append([record, time.perf_counter(), 0.0])
+        return record
+    
+    def exit(self, record):
+        _, started, child_seconds = self._open.pop()
+        seconds = time.perf_counter() - started
+        record['seconds'] = round(seconds, 6)
+        record['self_seconds'] = round(seconds - child_seconds, 6)
+        if record['rows'] is not None and seconds > 0:
+            record['rows_per_sec'] = round(record['rows'] / seconds)
+        peak = peak_memory_mb()
+        if peak is not None:
+            record['peak_memory_mb'] = round(peak, 1)
+        if self._open:
+            self._open[-1][2] += seconds
+    
+    def to_dict(self):
+        peak = peak_memory_mb()
+        return {
+            'total_seconds': round(time.perf_counter() - self._started, 6),
+            'peak_memory_mb': round(peak, 1) if peak is not None else None,
+            'stages': self.records
+        }
+    
+    def format_table(self):
+        """Return the recorded stages as an indented text table"""
+        lines = [f"{'stage':<34} {'seconds':>9} {'self':>9} {'rows':>12} {'rows/sec':>12} {'peak MB':>8}"]
+        for record in self.records:
+            name = '  ' * record['depth'] + record['stage']
+            rows = f"{record['rows']:,}" if record['rows'] is not None else '-'
+            rate = f"{record['rows_per_sec']:,}" if record['rows_per_sec'] is not None else '-'
+            peak = f"{record['peak_memory_mb']:.1f}" if record['peak_memory_mb'] is not None else '-'
+            lines.append(f"{name:<34} {record['seconds']:9.4f} {record['self_seconds']:9.4f} {rows:>12} {rate:>12} {peak:>8}")
+        return '\n'.join(lines)
+
+def profiled(rows=None):
+    """Time a DataProcessor method with self.profiler when one is set
+    
+    rows(processor, result) returns the number of rows the call processed.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.profiler is None:
+                return method(self, *args, **kwargs)
+            record = self.profiler.enter(method.__name__)
+            try:
+                result = method(self, *args, **kwargs)
+                if rows is not None:
+                    record['rows'] = rows(self, result)
+                return result
+            finally:
+                self.profiler.exit(record)
+        return wrapper
+    return decorator
+
+def approximate_size(value, sample=64):
+    """Return roughly how many bytes value and the lists, tuples and dicts inside it take
+    
+    Containers with more than sample items are sized from evenly spaced items, which
+    suits the uniform rows of query results.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        items = list(value.values())
+    elif isinstance(value, (list, tuple)):
+        items = value
+    else:
+        return size
+    if len(items) <= sample:
+        return size + sum(approximate_size(item, sample) for item in items)
+    step = len(items) / sample
+    sampled = sum(approximate_size(items[int(index * step)], sample) for index in range(sample))
+    return size + sampled * len(items) // sample
+
+def _freeze(value):
+    """Turn query arguments (filters, dimension lists) into a hashable cache key part"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+class QueryCache:
+    """Thread-safe LRU cache of query results, bounded by their approximate size in bytes
+    
+    Results larger than max_bytes are not kept. hits and misses count lookups since the
+    cache was created; clear() drops the entries but keeps the counters.
+    """
+    def __init__(self, max_bytes=QUERY_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[0]
+    
+    def put(self, key, result):
+        size = approximate_size(result)
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self.entries[key] = (result, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.bytes = 0
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None
+            }
+
+_MISSING = object()
+
+def cached_query(method):
+    """Answer repeated calls of a DataProcessor query from self.query_cache
+    
+    Calls are keyed on the method, its arguments and self.data_version; calls passed
+    precomputed aggregates or daily_data bypass the cache. Cached results are shared
+    between callers and must not be modified.
+    """
+    signature = inspect.signature(method)
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = list(bound.arguments.items())[1:]
+        if any(name in ('aggregates', 'daily_data') and value is not None for name, value in arguments):
+            return method(self, *args, **kwargs)
+        key = (method.__name__, self.data_version, _freeze(arguments))
+        result = self.query_cache.get(key, _MISSING)
+        if result is _MISSING:
+            result = method(self, *args, **kwargs)
+            # A load that finished meanwhile has already cleared the cache for its data
+            if self.data_version == key[1]:
+                self.query_cache.put(key, result)
+        return result
+    return wrapper
+
+def _result_rows(processor, result):
+    return result
+
+def _loaded_rows(processor, result):
+    return len(processor.marketing) + len(processor.business)
+
+def _output_rows(processor, result):
+    return len(result)
 
 class DataProcessor:
-    def __init__(self, data_dir="/home/runner/work/BI_Dasboard/BI_Dasboard/data"):
+    def __init__(self, data_dir="/home/runner/work/BI_Dasboard/BI_Dasboard/data", backend='memory'):
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend: {backend}")
+        self.backend = backend
         self.data_dir = data_dir
-        self.facebook_data = []
-        self.google_data = []
-        self.tiktok_data = []
-        self.business_data = []
+        self.cache_dir = os.path.join(data_dir, ".cache")
+        self.state_file = os.path.join(self.cache_dir, "incremental_state.json")
+        # With the 'sqlite' backend the marketing rows live in the database, not self.marketing
+        self.store = SQLiteStore(os.path.join(self.cache_dir, "dashboard.sqlite")) if backend == 'sqlite' else None
+        self.marketing = ColumnTable(MARKETING_SCHEMA)
+        self.business = ColumnTable(BUSINESS_SCHEMA)
+        # Set to a StageProfiler to record the time spent in each @profiled method
+        self.profiler = None
+        # Size and mtime of each CSV when the loaded rows were read, see reload_changed
+        self.source_signatures = None
+        # PlatformRegistry of data_dir, discovered on first use
+        self.platform_registry = None
+        # Dimensions (None for all rows) whose GroupSketches load_streaming, load_parallel
+        # and load_incremental keep, since they do not keep the rows to sketch later
+        self.sketch_dimensions = ()
+        # Results of the get_*/calculate_* queries, keyed on data_version, which every load bumps
+        self.query_cache = QueryCache()
+        self.data_version = 0
+        self._invalidate()
         
+    def _invalidate(self):
+        """Drop rollups, indexes and cached query results derived from previously loaded data"""
+        self.data_version += 1
+        self.query_cache.clear()
+        self._aggregates = None
+        self._cube = None
+        self._sketches = {}
+        self._indexes = {}
+        # False once a loader keeps only rollups (load_streaming, load_parallel, load_incremental)
+        self.rows_loaded = True
+        self.loaded_at = datetime.now()
+        
+    @profiled(_loaded_rows)
     def load_data(self):
-        """Load all CSV data files"""
-        self.facebook_data = self._load_csv("facebook.csv")
-        self.google_data = self._load_csv("google.csv")
-        self.tiktok_data = self._load_csv("tiktok.csv")
-        self.business_data = self._load_csv("business.csv")
-        
-    def _load_csv(self, filename):
-        """Load a CSV file and return data as list of dictionaries"""
+        """Load all CSV data files into typed column tables, or bulk-load them into the SQLite store"""
+        self._invalidate()
+        self.source_signatures = self._source_signatures()
+        if self.store is not None:
+            self._load_store(self._source_filenames())
+            return
+        self.marketing = ColumnTable(MARKETING_SCHEMA)
+        for platform, filename in self._platforms().files.items():
+            self._load_csv(self.marketing, filename, platform=platform)
+        # Date-ordered rows turn a date range into one contiguous row range
+        self.marketing = self.marketing.sort_by('date')
+        self.business = ColumnTable(BUSINESS_SCHEMA)
+        self._load_csv(self.business, "business.csv")
+        
+    def _load_store(self, filenames):
+        """Bulk-load the given CSVs into the SQLite store and read back the business rows"""
+        self.store.load(self.data_dir, self._platforms(), self.source_signatures, filenames)
+        self.marketing = ColumnTable(MARKETING_SCHEMA)
+        self.business = self.store.business_table()
+        
+    @profiled(_result_rows)
+    def _load_csv(self, table, filename, platform=None):
+        """Parse a CSV file from data_dir into table and return the number of rows added"""
         filepath = os.path.join(self.data_dir, filename)
-        data = []
-        with open(filepath, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                data.append(row)
-        return data
+        constants = {'platform': platform} if platform else None
+        return table.load_csv(filepath, constants)
+    
+    @profiled(_loaded_rows)
+    def load_cached(self):
+        """Load from the binary snapshot when the CSVs are unchanged, else parse and rewrite it
+        
+        The snapshot in cache_dir holds every column's raw bytes and is memory-mapped, so an
+        unchanged dataset loads without parsing. It is keyed on each source file's size and
+        mtime, falling back to a content hash when only the mtime differs. Tables loaded
+        from the snapshot are read-only. Returns True if the snapshot was used.
+        
+        With the SQLite store, the database itself is reused when it was loaded from the
+        same files.
+        """
+        sources = self._source_signatures()
+        if self.store is not None:
+            if self.store.sources() != sources:
+                self.load_data()
+                return False
+            self._invalidate()
+            self.source_signatures = sources
+            self.marketing = ColumnTable(MARKETING_SCHEMA)
+            self.business = self.store.business_table()
+            return True
+        if self._read_snapshot(sources):
+            self.source_signatures = self._source_signatures()
+            return True
+        self.load_data()
+        self._write_snapshot(sources)
+        return False
+    
+    @profiled(_loaded_rows)
+    def reload_changed(self, previous):
+        """Load the CSVs again, parsing only the files changed since previous loaded them
+        
+        Rows of unchanged files are copied from previous, which must have been loaded with
+        load_data, load_cached or reload_changed and is left untouched, so it can keep
+        serving queries meanwhile. The snapshot is rewritten for the next load_cached.
+        With the SQLite store only the changed files' rows are replaced in the database,
+        which previous then also reads. Returns the names of the files that were parsed.
+        """
+        sources = self._source_signatures()
+        loaded = previous.source_signatures or {}
+        changed = [filename for filename, signature in sources.items() if loaded.get(filename) != signature]
+        
+        self._invalidate()
+        self.source_signatures = {filename: dict(signature) for filename, signature in sources.items()}
+        if self.store is not None:
+            self._load_store(changed)
+            return changed
+        marketing = ColumnTable(MARKETING_SCHEMA)
+        platform_codes = previous.marketing['platform'].lookup
+        postings = None
+        for platform, filename in self._platforms().files.items():
+            if filename in changed:
+                self._load_csv(marketing, filename, platform=platform)
+            elif platform in platform_codes:
+                if postings is None:
+                    postings = previous.marketing.postings('platform')
+                marketing.append(previous.marketing.take(postings[platform_codes[platform]]))
+        # Same row order as load_data: platforms in turn, then stably by date
+        self.marketing = marketing.sort_by('date')
+        
+        self.business = ColumnTable(BUSINESS_SCHEMA)
+        if "business.csv" in changed:
+            self._load_csv(self.business, "business.csv")
+        else:
+            self.business.append(previous.business)
+        
+        self._write_snapshot(sources)
+        return changed
+    
+    def _platforms(self):
+        """Return the PlatformRegistry of data_dir, discovering the platform files on first use"""
+        if self.platform_registry is None:
+            self.platform_registry = PlatformRegistry.discover(self.data_dir)
+        return self.platform_registry
+    
+    def _source_filenames(self):
+        """Return the names of all CSV files loaded from data_dir"""
+        return self._platforms().filenames() + ["business.csv"]
+    
+    def _source_signatures(self):
+        """Return the size and mtime of each source file"""
+        signatures = {}
+        for filename in self._source_filenames():
+            stat = os.stat(os.path.join(self.data_dir, filename))
+            signatures[filename] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        return signatures
+    
+    def _file_hash(self, filename):
+        """Return the SHA-1 of a source file's contents"""
+        digest = hashlib.sha1()
+        with open(os.path.join(self.data_dir, filename), 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _read_snapshot(self, sources):
+        """Memory-map the snapshot if it matches sources; return whether it was loaded"""
+        manifest_file = os.path.join(self.cache_dir, "snapshot.json")
+        try:
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if manifest.get('version') != SNAPSHOT_VERSION or manifest.get('byteorder') != sys.byteorder:
+            return False
+        if set(manifest['sources']) != set(sources):
+            return False
+        touched = False
+        for filename, signature in sources.items():
+            saved = manifest['sources'][filename]
+            if saved['size'] != signature['size']:
+                return False
+            if saved['mtime_ns'] != signature['mtime_ns']:
+                if saved['sha1'] != self._file_hash(filename):
+                    return False
+                # Same contents with a new mtime; remember it so the hash is not needed again
+                saved['mtime_ns'] = signature['mtime_ns']
+                touched = True
+        for layout in manifest['tables'].values():
+            if any(array(entry['typecode']).itemsize != entry['itemsize'] for entry in layout):
+                return False
+        
+        try:
+            with open(os.path.join(self.cache_dir, manifest['data_file']), 'rb') as file:
+                size = os.fstat(file.fileno()).st_size
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        except OSError:
+            return False
+        self._invalidate()
+        self.marketing = ColumnTable.from_buffer(MARKETING_SCHEMA, manifest['tables']['marketing'], buffer)
+        self.business = ColumnTable.from_buffer(BUSINESS_SCHEMA, manifest['tables']['business'], buffer)
+        self.marketing.sort_key = manifest['sort_keys'].get('marketing')
+        self.business.sort_key = manifest['sort_keys'].get('business')
+        if touched:
+            self._write_json(manifest_file, manifest)
+        return True
+    
+    def _write_snapshot(self, sources):
+        """Write the loaded tables to a new snapshot file and point the manifest at it"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for filename, signature in sources.items():
+            signature['sha1'] = self._file_hash(filename)
+        
+        # A fresh data file per snapshot leaves files mapped by other processes untouched
+        data_file = f"snapshot-{os.getpid()}-{datetime.now().strftime('%Y%m%d%H%M%S%f')}.bin"
+        with open(os.path.join(self.cache_dir, data_file), 'wb') as file:
+            tables = {
+                'marketing': self.marketing.dump(file),
+                'business': self.business.dump(file)
+            }
+        manifest = {
+            'version': SNAPSHOT_VERSION,
+            'byteorder': sys.byteorder,
+            'sources': sources,
+            'data_file': data_file,
+            'tables': tables,
+            'sort_keys': {'marketing': self.marketing.sort_key, 'business': self.business.sort_key}
+        }
+        self._write_json(os.path.join(self.cache_dir, "snapshot.json"), manifest)
+        
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("snapshot-") and name.endswith(".bin") and name != data_file:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+    
+    @profiled(_result_rows)
+    def load_streaming(self, batch_size=CSV_BATCH_SIZE):
+        """Aggregate the marketing CSVs batch by batch without keeping their rows
+        
+        Memory is bounded by batch_size and the number of distinct dates and campaigns,
+        not by file size. self.marketing is left empty; the get_* methods report from the
+        rollups, and filtered queries and rollups raise RuntimeError. Returns the number of
+        marketing rows aggregated.
+        """
+        self.marketing = ColumnTable(MARKETING_SCHEMA)
+        self.business = ColumnTable(BUSINESS_SCHEMA)
+        self._load_csv(self.business, "business.csv")
+        self._invalidate()
+        self.rows_loaded = False
+        self._aggregates = MarketingAggregates()
+        self._sketches = {dimension: GroupSketches(dimension) for dimension in self.sketch_dimensions}
+        rows = 0
+        for batch in self._stream_marketing(batch_size):
+            self._aggregates.add_table(batch)
+            for sketches in self._sketches.values():
+                sketches.add_table(batch)
+            rows += len(batch)
+        return rows
+    
+    def _stream_marketing(self, batch_size=CSV_BATCH_SIZE):
+        """Yield the marketing data of every platform as small ColumnTable batches"""
+        for platform, filename in self._platforms().files.items():
+            filepath = os.path.join(self.data_dir, filename)
+            yield from iter_csv_tables(filepath, MARKETING_SCHEMA, {'platform': platform}, batch_size)
+    
+    @profiled(_result_rows)
+    def load_parallel(self, workers=None, chunk_bytes=PARALLEL_CHUNK_BYTES):
+        """Parse and aggregate the platform CSVs in a pool of worker processes
+        
+        Every platform file is split into byte ranges of about chunk_bytes; each worker
+        aggregates one range and the partial rollups are merged here in file order.
+        workers defaults to the number of CPUs. As with load_streaming, self.marketing is
+        left empty. Returns the number of marketing rows aggregated.
+        """
+        tasks = []
+        for platform, filename in self._platforms().files.items():
+            filepath = os.path.join(self.data_dir, filename)
+            for start, end in split_csv(filepath, chunk_bytes):
+                tasks.append((filepath, platform, start, end, CSV_BATCH_SIZE, self.sketch_dimensions))
+        
+        self.marketing = ColumnTable(MARKETING_SCHEMA)
+        self.business = ColumnTable(BUSINESS_SCHEMA)
+        self._load_csv(self.business, "business.csv")
+        self._invalidate()
+        self.rows_loaded = False
+        self._aggregates = MarketingAggregates()
+        self._sketches = {dimension: GroupSketches(dimension) for dimension in self.sketch_dimensions}
+        rows = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for partial, partial_rows, partial_sketches in pool.map(aggregate_csv_range, *zip(*tasks)):
+                self._aggregates.merge(partial)
+                for dimension, sketches in partial_sketches.items():
+                    self._sketches[dimension].merge(sketches)
+                rows += partial_rows
+        return rows
+    
+    @profiled(_result_rows)
+    def load_incremental(self, state_file=None):
+        """Read only rows appended since the last run and merge them into persisted rollups
+        
+        The state file keeps each source file's byte offset and row count together with the
+        daily/platform/campaign rollups and business rows for the full history. The new rows
+        are parsed in batches and folded into the rollups as they are read; as with
+        load_streaming, self.marketing is left empty, so the get_* methods report the full
+        history while filtered queries and rollups raise RuntimeError.
+        A source file that shrank, disappeared or whose leading bytes changed triggers a full
+        rebuild (a new platform file is read from its start), as does asking for
+        sketch_dimensions that the saved state has no sketches for.
+        Returns the number of marketing rows read.
+        """
+        state_file = state_file or self.state_file
+        state = self._read_state(state_file)
+        saved_sketches = {sketches['dimension']: sketches for sketches in (state or {}).get('sketches', [])}
+        filenames = self._source_filenames()
+        if (state is None
+                or not set(state['files']).issubset(filenames)
+                or not all(self._is_appended(filename, state['files'].get(filename)) for filename in filenames)
+                or not all(dimension in saved_sketches for dimension in self.sketch_dimensions)):
+            saved_sketches = {}
+            state = {'version': STATE_VERSION, 'files': {}, 'business': {}}
+            state.update(MarketingAggregates().to_state())
+        
+        # Business data has one row per date; newer rows replace older ones
+        for batch in self._read_appended("business.csv", state['files'], BUSINESS_SCHEMA):
+            for row in batch.rows():
+                state['business'][row['date']] = [row[name] for name, _ in BUSINESS_SCHEMA[1:]]
+        self.marketing = ColumnTable(MARKETING_SCHEMA)
+        self.business = ColumnTable(BUSINESS_SCHEMA)
+        self.business.extend_rows([name for name, _ in BUSINESS_SCHEMA],
+                                  ([date] + values for date, values in sorted(state['business'].items())))
+        
+        self._invalidate()
+        self.rows_loaded = False
+        self._aggregates = MarketingAggregates.from_state(state)
+        for dimension in self.sketch_dimensions:
+            self._sketches[dimension] = (GroupSketches.from_state(saved_sketches[dimension])
+                                         if dimension in saved_sketches else GroupSketches(dimension))
+        rows = 0
+        for platform, filename in self._platforms().files.items():
+            for batch in self._read_appended(filename, state['files'], MARKETING_SCHEMA, {'platform': platform}):
+                self._aggregates.add_table(batch)
+                for sketches in self._sketches.values():
+                    sketches.add_table(batch)
+                rows += len(batch)
+        state.update(self._aggregates.to_state())
+        state['sketches'] = [sketches.to_state() for sketches in self._sketches.values()]
+        self._write_json(state_file, state)
+        return rows
+    
+    def _read_state(self, state_file):
+        """Return the saved incremental state, or None if missing or incompatible"""
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state if state.get('version') == STATE_VERSION else None
+    
+    def _write_json(self, path, data):
+        """Atomically replace a JSON file"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_file = path + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, path)
+    
+    def _fingerprint(self, file, length):
+        """Hash the first length bytes of an open binary file"""
+        file.seek(0)
+        return hashlib.sha1(file.read(length)).hexdigest()
+    
+    def _is_appended(self, filename, file_state):
+        """Check that a source file only grew since file_state was recorded"""
+        if file_state is None:
+            return True
+        filepath = os.path.join(self.data_dir, filename)
+        if os.path.getsize(filepath) < file_state['offset']:
+            return False
+        with open(filepath, 'rb') as file:
+            return self._fingerprint(file, file_state['fingerprint_length']) == file_state['fingerprint']
+    
+    def _read_appended(self, filename, files, schema, constants=None, batch_size=CSV_BATCH_SIZE):
+        """Yield the complete lines added to a CSV since its recorded offset as ColumnTable batches
+        
+        The byte range is streamed rather than read at once. files[filename] is moved to the
+        end of the range up front and its row count grows with every batch yielded.
+        """
+        filepath = os.path.join(self.data_dir, filename)
+        file_state = files.get(filename) or {'offset': 0, 'rows': 0}
+        with open(filepath, 'rb') as file:
+            header_line = file.readline()
+            offset = max(file_state['offset'], len(header_line))
+            # A partially written last line is left for the next run
+            end = self._last_line_end(file, offset)
+            fingerprint_length = min(end, FINGERPRINT_BYTES)
+            fingerprint = self._fingerprint(file, fingerprint_length)
+        
+        header = next(csv.reader([header_line.decode('utf-8')]))
+        file_state = files[filename] = {
+            'offset': end,
+            'rows': file_state['rows'],
+            'fingerprint': fingerprint,
+            'fingerprint_length': fingerprint_length
+        }
+        for batch in iter_row_tables(header, csv.reader(_iter_csv_range(filepath, offset, end)),
+                                     schema, constants, batch_size):
+            file_state['rows'] += len(batch)
+            yield batch
+    
+    @staticmethod
+    def _last_line_end(file, start, block_size=64 * 1024):
+        """Return the offset just past the last newline of an open binary file at or after start"""
+        end = file.seek(0, os.SEEK_END)
+        while end > start:
+            block_start = max(start, end - block_size)
+            file.seek(block_start)
+            newline = file.read(end - block_start).rfind(b'\n')
+            if newline >= 0:
+                return block_start + newline + 1
+            end = block_start
+        return start
+    
+    def marketing_row_count(self):
+        """Return the number of loaded marketing rows, in memory or in the SQLite store"""
+        return self.store.count() if self.store is not None else len(self.marketing)
+    
+    def _business_by_date(self):
+        """Map each business date to its row index (last row wins on duplicates)"""
+        if 'business_date' not in self._indexes:
+            self._indexes['business_date'] = {date: index for index, date in enumerate(self.business['date'])}
+        return self._indexes['business_date']
     
+    @profiled(_output_rows)
     def get_combined_marketing_data(self):
-        """Combine all marketing platform data with platform column"""
-        combined = []
-        
-        for row in self.facebook_data:
-            row_copy = row.copy()
-            row_copy['platform'] = 'Facebook'
-            combined.append(row_copy)
-            
-        for row in self.google_data:
-            row_copy = row.copy()
-            row_copy['platform'] = 'Google'
-            combined.append(row_copy)
-            
-        for row in self.tiktok_data:
-            row_copy = row.copy()
-            row_copy['platform'] = 'TikTok'
-            combined.append(row_copy)
-            
-        return combined
-    
-    def calculate_daily_metrics(self):
-        """Calculate key daily metrics for dashboard"""
-        marketing_data = self.get_combined_marketing_data()
-        
-        # Group marketing data by date
-        daily_marketing = defaultdict(lambda: {
-            'impressions': 0,
-            'clicks': 0,
-            'spend': 0.0,
-            'attributed_revenue': 0.0,
-            'facebook_spend': 0.0,
-            'google_spend': 0.0,
-            'tiktok_spend': 0.0,
-            'facebook_revenue': 0.0,
-            'google_revenue': 0.0,
-            'tiktok_revenue': 0.0
-        })
-        
-        for row in marketing_data:
-            date = row['date']
-            platform = row['platform'].lower()
-            
-            daily_marketing[date]['impressions'] += int(row['impressions'])
-            daily_marketing[date]['clicks'] += int(row['clicks'])
-            daily_marketing[date]['spend'] += float(row['spend'])
-            daily_marketing[date]['attributed_revenue'] += float(row['attributed_revenue'])
-            daily_marketing[date][f'{platform}_spend'] += float(row['spend'])
-            daily_marketing[date][f'{platform}_revenue'] += float(row['attributed_revenue'])
+        """Return every platform's marketing rows, with their platform, as a lazy RowsView
+        
+        The platforms already share one columnar table, so no rows are copied. With the
+        SQLite store a StoreRowsView reads the rows from the database instead.
+        """
+        if self.store is not None:
+            return StoreRowsView(self.store)
+        return RowsView(self.marketing)
+    
+    @profiled()
+    def build_indexes(self):
+        """Build the full rollups and every filter index up front, e.g. before serving queries"""
+        self.aggregate()
+        self._business_by_date()
+        if self.store is not None:
+            return
+        self._table_index().build()
+        self.get_cube()
+        
+    def _table_index(self):
+        """Return the TableIndex of the current marketing table, created on first use"""
+        index = self._indexes.get('marketing')
+        if index is None or index.table is not self.marketing:
+            index = self._indexes['marketing'] = TableIndex(self.marketing)
+        return index
+    
+    def _require_rows(self, query):
+        """Raise RuntimeError if self.marketing does not hold every loaded marketing row"""
+        if not self.rows_loaded:
+            raise RuntimeError(f"{query} need the marketing rows, but the last load kept only rollups; "
+                               "use load_data or load_cached instead of load_streaming, load_parallel "
+                               "or load_incremental")
+    
+    def select_rows(self, filters):
+        """Return ascending marketing row indexes matching filters (see TableIndex.select)"""
+        self._require_rows("filtered queries")
+        return self._table_index().select(filters)
+    
+    @profiled()
+    def aggregate(self, filters=None):
+        """Compute daily, platform and campaign rollups in a single scan of the marketing data
+        
+        With filters (see select_rows) only the matching rows are aggregated. The SQLite
+        store computes the rollups with GROUP BY queries instead of a scan.
+        """
+        if self.store is not None:
+            if filters:
+                return self.store.aggregate(filters)
+            if self._aggregates is None:
+                self._aggregates = self.store.aggregate()
+            return self._aggregates
+        rows = self.select_rows(filters) if filters else None
+        if rows is not None:
+            aggregates = MarketingAggregates()
+            aggregates.add_table(self.marketing.take(rows))
+            return aggregates
+        if self._aggregates is None:
+            self._aggregates = MarketingAggregates()
+            self._aggregates.add_table(self.marketing)
+        return self._aggregates
+    
+    def _daily_columns(self, aggregates):
+        """Return the sorted dates of aggregates and their unrounded per-day totals, one list per column"""
+        dates = sorted(aggregates.daily)
+        totals = [aggregates.daily[date] for date in dates]
+        columns = OrderedDict()
+        for position, name in enumerate(ADDITIVE_MEASURES):
+            columns[name] = [day[position] for day in totals]
         
         # Combine with business data
-        business_dict = {row['date']: row for row in self.business_data}
+        b = self.business
+        business_index = self._business_by_date()
+        rows = [business_index.get(date) for date in dates]
+        kinds = dict(BUSINESS_SCHEMA)
+        for name in DAILY_BUSINESS_COLUMNS:
+            values = b[name]
+            missing = 0.0 if kinds[name] == 'float' else 0
+            columns[name] = [values[row] if row is not None else missing for row in rows]
         
-        result = []
-        for date in sorted(daily_marketing.keys()):
-            marketing = daily_marketing[date]
-            business = business_dict.get(date, {})
-            
-            # Calculate derived metrics
-            ctr = (marketing['clicks'] / marketing['impressions']) * 100 if marketing['impressions'] > 0 else 0
-            cpc = marketing['spend'] / marketing['clicks'] if marketing['clicks'] > 0 else 0
-            roas = marketing['attributed_revenue'] / marketing['spend'] if marketing['spend'] > 0 else 0
-            
-            total_revenue = float(business.get('total_revenue', 0))
-            marketing_attribution = (marketing['attributed_revenue'] / total_revenue) * 100 if total_revenue > 0 else 0
-            
-            result.append({
-                'date': date,
-                'impressions': marketing['impressions'],
-                'clicks': marketing['clicks'],
-                'spend': round(marketing['spend'], 2),
-                'attributed_revenue': round(marketing['attributed_revenue'], 2),
-                'ctr': round(ctr, 3),
-                'cpc': round(cpc, 2),
-                'roas': round(roas, 2),
-                'orders': int(business.get('orders', 0)),
-                'new_customers': int(business.get('new_customers', 0)),
-                'total_revenue': round(total_revenue, 2),
-                'gross_profit': round(float(business.get('gross_profit', 0)), 2),
-                'marketing_attribution': round(marketing_attribution, 1),
-                'facebook_spend': round(marketing['facebook_spend'], 2),
-                'google_spend': round(marketing['google_spend'], 2),
-                'tiktok_spend': round(marketing['tiktok_spend'], 2),
-                'facebook_revenue': round(marketing['facebook_revenue'], 2),
-                'google_revenue': round(marketing['google_revenue'], 2),
-                'tiktok_revenue': round(marketing['tiktok_revenue'], 2)
-            })
-            
+        # One spend and one revenue column per platform, read from the dense per-day arrays
+        platforms = self._platforms().names()
+        platforms += [platform for platform in aggregates.platform_names if platform not in platforms]
+        for measure, suffix in enumerate(('spend', 'revenue')):
+            for platform in platforms:
+                columns[f'{platform.lower()}_{suffix}'] = aggregates.platform_series(platform, dates, measure)
+        return dates, columns
+    
+    def _series_rows(self, labels, columns):
+        """Build time series rows from labels and additive columns; ratios are derived after summing"""
+        result = group_metrics(labels, list(zip(*(columns[name] for name in ADDITIVE_MEASURES))))
+        
+        derived = [
+            ('orders', columns['orders']),
+            ('new_customers', columns['new_customers']),
+            ('total_revenue', round_values(columns['total_revenue'], 2)),
+            ('gross_profit', round_values(columns['gross_profit'], 2)),
+            ('marketing_attribution',
+             round_values(ratios(columns['attributed_revenue'], columns['total_revenue'], 100), 1))
+        ]
+        for name in columns:
+            if name not in ADDITIVE_MEASURES and name not in DAILY_BUSINESS_COLUMNS:
+                # Per-platform spend and revenue
+                derived.append((name, round_values(columns[name], 2)))
+        
+        keys = [key for key, _ in derived]
+        for row, values in zip(result, zip(*(column for _, column in derived))):
+            row.update(zip(keys, values))
         return result
     
-    def get_platform_performance(self):
+    @profiled(_output_rows)
+    @cached_query
+    def calculate_daily_metrics(self, aggregates=None, filters=None):
+        """Calculate key daily metrics for dashboard"""
+        if aggregates is None:
+            aggregates = self.aggregate(filters)
+        
+        dates, columns = self._daily_columns(aggregates)
+        return self._series_rows(({'date': date} for date in dates), columns)
+    
+    @profiled(_output_rows)
+    @cached_query
+    def calculate_period_metrics(self, period, aggregates=None, filters=None):
+        """Calculate metrics per calendar week, month or quarter, keyed by the bucket's first day
+        
+        'days' counts the days with data in each bucket.
+        """
+        if aggregates is None:
+            aggregates = self.aggregate(filters)
+        
+        dates, columns = self._daily_columns(aggregates)
+        starts = [period_start(date, period) for date in dates]
+        # Dates are sorted, so every bucket is one contiguous run of days
+        boundaries = [index for index in range(1, len(starts)) if starts[index] != starts[index - 1]]
+        runs = list(zip([0] + boundaries, boundaries + [len(starts)])) if starts else []
+        
+        buckets = OrderedDict((name, [sum(values[begin:end]) for begin, end in runs]) for name, values in columns.items())
+        labels = ({'date': starts[begin], 'days': end - begin} for begin, end in runs)
+        return self._series_rows(labels, buckets)
+    
+    @profiled(_output_rows)
+    @cached_query
+    def calculate_rolling_metrics(self, window, aggregates=None, filters=None):
+        """Calculate metrics over the trailing window days ending on each date with data
+        
+        Sums slide along the dates in one pass instead of being recomputed per window;
+        'days' counts the days with data inside each window.
+        """
+        if window < 1:
+            raise ValueError("window must be at least one day")
+        if aggregates is None:
+            aggregates = self.aggregate(filters)
+        
+        dates, columns = self._daily_columns(aggregates)
+        ordinals = [datetime.strptime(date, '%Y-%m-%d').toordinal() for date in dates]
+        # first[i] is the first day still inside the window ending on day i
+        first = []
+        start = 0
+        for ordinal in ordinals:
+            while ordinal - ordinals[start] >= window:
+                start += 1
+            first.append(start)
+        
+        windows = OrderedDict()
+        for name, values in columns.items():
+            total = 0
+            sums = []
+            start = 0
+            for index, value in enumerate(values):
+                total += value
+                while start < first[index]:
+                    total -= values[start]
+                    start += 1
+                sums.append(total)
+            windows[name] = sums
+        labels = ({'date': date, 'days': index - start + 1} for index, (date, start) in enumerate(zip(dates, first)))
+        return self._series_rows(labels, windows)
+    
+    @profiled(_output_rows)
+    def get_time_series(self, period='day', aggregates=None, filters=None):
+        """Get the metrics time series at one of TIME_SERIES_PERIODS"""
+        if period == 'day':
+            return self.calculate_daily_metrics(aggregates, filters)
+        if period in ROLLING_WINDOWS:
+            return self.calculate_rolling_metrics(ROLLING_WINDOWS[period], aggregates, filters)
+        if period in PERIOD_BUCKETS:
+            return self.calculate_period_metrics(period, aggregates, filters)
+        raise ValueError(f"unknown period: {period} (expected one of: {', '.join(TIME_SERIES_PERIODS)})")
+    
+    @profiled(_output_rows)
+    @cached_query
+    def get_platform_performance(self, aggregates=None, filters=None):
         """Get platform-level performance metrics"""
-        marketing_data = self.get_combined_marketing_data()
-        
-        platform_metrics = defaultdict(lambda: {
-            'impressions': 0,
-            'clicks': 0,
-            'spend': 0.0,
-            'attributed_revenue': 0.0,
-            'campaigns': set()
-        })
-        
-        for row in marketing_data:
-            platform = row['platform']
-            platform_metrics[platform]['impressions'] += int(row['impressions'])
-            platform_metrics[platform]['clicks'] += int(row['clicks'])
-            platform_metrics[platform]['spend'] += float(row['spend'])
-            platform_metrics[platform]['attributed_revenue'] += float(row['attributed_revenue'])
-            platform_metrics[platform]['campaigns'].add(row['campaign'])
+        if aggregates is None:
+            aggregates = self.aggregate(filters)
         
-        result = []
-        for platform, metrics in platform_metrics.items():
-            ctr = (metrics['clicks'] / metrics['impressions']) * 100 if metrics['impressions'] > 0 else 0
-            cpc = metrics['spend'] / metrics['clicks'] if metrics['clicks'] > 0 else 0
-            roas = metrics['attributed_revenue'] / metrics['spend'] if metrics['spend'] > 0 else 0
-            
-            result.append({
-                'platform': platform,
-                'impressions': metrics['impressions'],
-                'clicks': metrics['clicks'],
-                'spend': round(metrics['spend'], 2),
-                'attributed_revenue': round(metrics['attributed_revenue'], 2),
-                'ctr': round(ctr, 3),
-                'cpc': round(cpc, 2),
-                'roas': round(roas, 2),
-                'campaigns': len(metrics['campaigns'])
-            })
+        platforms = list(aggregates.platforms.items())
+        result = group_metrics(({'platform': platform} for platform, _ in platforms),
+                               [totals for _, totals in platforms])
+        for row, (_, totals) in zip(result, platforms):
+            row['campaigns'] = len(totals[4])
         
         return sorted(result, key=lambda x: x['spend'], reverse=True)
     
-    def get_campaign_performance(self):
+    @profiled(_output_rows)
+    @cached_query
+    def get_campaign_performance(self, aggregates=None, filters=None):
         """Get campaign-level performance metrics"""
-        marketing_data = self.get_combined_marketing_data()
-        
-        campaign_metrics = defaultdict(lambda: {
-            'impressions': 0,
-            'clicks': 0,
-            'spend': 0.0,
-            'attributed_revenue': 0.0,
-            'platform': ''
-        })
-        
-        for row in marketing_data:
-            campaign = row['campaign']
-            campaign_metrics[campaign]['impressions'] += int(row['impressions'])
-            campaign_metrics[campaign]['clicks'] += int(row['clicks'])
-            campaign_metrics[campaign]['spend'] += float(row['spend'])
-            campaign_metrics[campaign]['attributed_revenue'] += float(row['attributed_revenue'])
-            campaign_metrics[campaign]['platform'] = row['platform']
+        if aggregates is None:
+            aggregates = self.aggregate(filters)
         
-        result = []
-        for campaign, metrics in campaign_metrics.items():
-            ctr = (metrics['clicks'] / metrics['impressions']) * 100 if metrics['impressions'] > 0 else 0
-            cpc = metrics['spend'] / metrics['clicks'] if metrics['clicks'] > 0 else 0
-            roas = metrics['attributed_revenue'] / metrics['spend'] if metrics['spend'] > 0 else 0
-            
-            result.append({
-                'campaign': campaign,
-                'platform': metrics['platform'],
-                'impressions': metrics['impressions'],
-                'clicks': metrics['clicks'],
-                'spend': round(metrics['spend'], 2),
-                'attributed_revenue': round(metrics['attributed_revenue'], 2),
-                'ctr': round(ctr, 3),
-                'cpc': round(cpc, 2),
-                'roas': round(roas, 2)
-            })
+        campaigns = list(aggregates.campaigns.items())
+        result = group_metrics(({'campaign': campaign, 'platform': totals[4]} for campaign, totals in campaigns),
+                               [totals for _, totals in campaigns])
         
         return sorted(result, key=lambda x: x['spend'], reverse=True)
     
-    def get_summary_metrics(self):
-        """Get overall summary metrics"""
-        daily_data = self.calculate_daily_metrics()
+    @profiled()
+    @cached_query
+    def get_summary_metrics(self, daily_data=None, filters=None):
+        """Get overall summary metrics, derived from the daily rollup"""
+        if daily_data is None:
+            daily_data = self.calculate_daily_metrics(filters=filters)
         
         if not daily_data:
             return {}
@@ -238,37 +2314,315 @@ class DataProcessor:
             'attribution_rate': round((total_attributed_revenue / total_revenue) * 100, 1) if total_revenue > 0 else 0
         }
     
-    def export_dashboard_data(self, output_file="/home/runner/work/BI_Dasboard/BI_Dasboard/dashboard_data.json"):
-        """Export processed data for dashboard"""
-        data = {
-            'summary': self.get_summary_metrics(),
-            'daily_metrics': self.calculate_daily_metrics(),
-            'platform_performance': self.get_platform_performance(),
-            'campaign_performance': self.get_campaign_performance(),
-            'last_updated': datetime.now().isoformat()
+    def get_cube(self):
+        """Return the rollup cube of the loaded marketing rows, built on first use"""
+        if self._cube is None:
+            self._require_rows("rollups")
+            self._cube = RollupCube(self.marketing)
+        return self._cube
+    
+    @profiled(_output_rows)
+    @cached_query
+    def get_rollup(self, dimensions, filters=None):
+        """Get metrics grouped by any subset of CUBE_DIMENSIONS, rolled up from the cube
+        
+        With the SQLite store the grouping is a GROUP BY query over the stored rows.
+        """
+        if self.store is not None:
+            return self.store.rollup(dimensions, filters)
+        return self.get_cube().rollup(dimensions, filters)
+    
+    @profiled(_output_rows)
+    @cached_query
+    def get_sketches(self, dimension=None, filters=None):
+        """Get approximate distinct counts and spend/CPC quantiles per value of dimension
+        
+        Each group's state is a fixed-size GroupSketches entry rather than a set of values.
+        dimension is one of CUBE_DIMENSIONS, or None to sketch all matching rows as one
+        group. Unfiltered sketches are kept; those kept by the loaders for
+        sketch_dimensions answer without the rows.
+        """
+        if dimension is not None:
+            check_rollup_dimensions([dimension])
+        sketches = None if filters else self._sketches.get(dimension)
+        if sketches is None:
+            sketches = GroupSketches(dimension)
+            if self.store is not None:
+                for table in self.store.iter_tables(filters):
+                    sketches.add_table(table)
+            else:
+                self._require_rows("sketches not kept by the loader")
+                rows = self.select_rows(filters) if filters else None
+                sketches.add_table(self.marketing.take(rows) if rows is not None else self.marketing)
+            if not filters:
+                self._sketches[dimension] = sketches
+        return sketches.results()
+    
+    @profiled()
+    @cached_query
+    def get_dashboard_data(self, filters=None, period='day'):
+        """Get every dashboard section, optionally restricted to rows matching filters
+        
+        period selects the time series shipped as daily_metrics (see TIME_SERIES_PERIODS).
+        """
+        # One scan of the data feeds every section; summary is derived from the daily rollup
+        aggregates = self.aggregate(filters)
+        daily_metrics = self.calculate_daily_metrics(aggregates)
+        return {
+            'summary': self.get_summary_metrics(daily_metrics),
+            'period': period,
+            'daily_metrics': daily_metrics if period == 'day' else self.get_time_series(period, aggregates),
+            'platform_performance': self.get_platform_performance(aggregates),
+            'campaign_performance': self.get_campaign_performance(aggregates),
+            'last_updated': self.loaded_at.isoformat()
         }
+    
+    @profiled()
+    def export_dashboard_data(self, output_file="/home/runner/work/BI_Dasboard/BI_Dasboard/dashboard_data.json",
+                              period='day', encoder='indent', columnar=False):
+        """Export processed data for dashboard
+        
+        encoder is one of JSON_ENCODERS; columnar writes each table as a dict of column
+        lists (marked with 'layout': 'columnar') instead of a list of row objects.
+        If an earlier export_dashboard_shards left a manifest in the directory named after
+        output_file (dashboard_data/ for dashboard_data.json), the shards are rewritten too,
+        with the page size, period and encoder they were exported with, since dashboard.html
+        prefers them.
+        """
+        data = self.get_dashboard_data(period=period)
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        if columnar:
+            payload = to_columnar(data)
+            payload['layout'] = 'columnar'
+        else:
+            payload = data
+        write_precompressed(output_file, encode_json(payload, encoder))
+        
+        shard_dir = os.path.splitext(output_file)[0]
+        try:
+            with open(os.path.join(shard_dir, "manifest.json"), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = None
+        if manifest is not None:
+            pages = manifest.get('campaign_performance', {})
+            self.export_dashboard_shards(shard_dir, page_size=pages.get('page_size', CAMPAIGN_PAGE_SIZE),
+                                         period=manifest.get('period', period),
+                                         encoder=manifest.get('encoder', 'compact'))
         
         return data
 
-def main():
+    @profiled()
+    def export_dashboard_shards(self, output_dir="/home/runner/work/BI_Dasboard/BI_Dasboard/dashboard_data",
+                                page_size=CAMPAIGN_PAGE_SIZE, period='day', encoder='compact'):
+        """Export the dashboard as a manifest plus compact shards that can be fetched separately
+        
+        Writes summary.json, platforms.json, one daily/YYYY-MM.json per month of the time
+        series and campaigns/page-NNNN.json pages of the campaign table (highest spend first).
+        The manifest is written last, so it never lists a shard that does not exist yet.
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        data = self.get_dashboard_data(period=period)
+        
+        def write_shard(path, payload):
+            write_precompressed(os.path.join(output_dir, path), encode_json(payload, encoder))
+            return path
+        
+        for directory in ('daily', 'campaigns'):
+            os.makedirs(os.path.join(output_dir, directory), exist_ok=True)
+        
+        months = OrderedDict()
+        for row in data['daily_metrics']:
+            months.setdefault(row['date'][:7], []).append(row)
+        daily_shards = []
+        for month, rows in months.items():
+            daily_shards.append({
+                'month': month,
+                'path': write_shard(f'daily/{month}.json', rows),
+                'rows': len(rows),
+                'start_date': rows[0]['date'],
+                'end_date': rows[-1]['date']
+            })
+        
+        campaigns = data['campaign_performance']
+        pages = [write_shard(f'campaigns/page-{page + 1:04d}.json', campaigns[start:start + page_size])
+                 for page, start in enumerate(range(0, len(campaigns), page_size))]
+        
+        manifest = {
+            'version': SHARD_VERSION,
+            'last_updated': data['last_updated'],
+            'period': period,
+            'encoder': encoder,
+            'summary': write_shard('summary.json', data['summary']),
+            'platform_performance': write_shard('platforms.json', data['platform_performance']),
+            'daily_metrics': daily_shards,
+            'campaign_performance': {'rows': len(campaigns), 'page_size': page_size, 'pages': pages}
+        }
+        write_shard('manifest.json', manifest)
+        
+        # Drop shards of an earlier export that the new manifest no longer lists
+        remove_stale_files(os.path.join(output_dir, 'daily'),
+                           {os.path.basename(shard['path']) for shard in daily_shards})
+        remove_stale_files(os.path.join(output_dir, 'campaigns'), {os.path.basename(path) for path in pages})
+        return manifest
+
+def discover_accounts(root):
+    """Return the sorted names of root's subdirectories holding business.csv and platform CSVs"""
+    return sorted(entry.name for entry in os.scandir(root)
+                  if entry.is_dir() and not entry.name.startswith('.')
+                  and os.path.isfile(os.path.join(entry.path, "business.csv"))
+                  and PlatformRegistry.discover(entry.path).files)
+
+def process_account(data_dir, output_file, period='day', encoder='indent', backend='memory'):
+    """Load one account, from its own snapshot when unchanged, and export its dashboard
+    
+    Runs in worker processes; returns the account's summary, row count and whether its
+    cache was used.
+    """
+    processor = DataProcessor(data_dir, backend=backend)
+    cached = processor.load_cached()
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    data = processor.export_dashboard_data(output_file, period=period, encoder=encoder)
+    return {'summary': data['summary'], 'rows': processor.marketing_row_count(), 'cached': cached}
+
+def process_accounts(root, output_dir, workers=None, period='day', encoder='indent', backend='memory'):
+    """Export every account under root to output_dir/<account>/dashboard_data.json in parallel
+    
+    Each account is a subdirectory of root laid out like data/ and keeps its own cache in
+    its .cache directory; accounts are processed as independent tasks on workers processes
+    (default: the number of CPUs). Returns {account: process_account result}.
+    """
+    accounts = discover_accounts(root)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = OrderedDict(
+            (account, pool.submit(process_account, os.path.join(root, account),
+                                  os.path.join(output_dir, account, "dashboard_data.json"), period, encoder, backend))
+            for account in accounts)
+        return OrderedDict((account, future.result()) for account, future in futures.items())
+
+def main(argv=None):
     """Process data and generate dashboard JSON"""
-    processor = DataProcessor()
-    processor.load_data()
+    parser = argparse.ArgumentParser(description="Process marketing and business data for the dashboard")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--incremental", action="store_true",
+                      help="only read rows appended since the last incremental run")
+    mode.add_argument("--stream", action="store_true",
+                      help="aggregate the CSVs in bounded memory without keeping their rows")
+    mode.add_argument("--workers", type=int, metavar="N",
+                      help="parse and aggregate the CSVs in N worker processes")
+    parser.add_argument("--accounts", metavar="ROOT",
+                        help="process every account subdirectory of ROOT in parallel (--workers processes) "
+                             "and write accounts/<account>/dashboard_data.json")
+    parser.add_argument("--backend", choices=BACKENDS, default='memory',
+                        help="keep the rows in memory or in an on-disk SQLite database that is queried with SQL")
+    parser.add_argument("--sketch-by", choices=CUBE_DIMENSIONS, metavar="DIMENSION",
+                        help="print approximate distinct counts and spend/CPC quantiles per value of DIMENSION "
+                             "(kept across --workers partitions and --incremental runs)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always parse the CSVs instead of using the binary snapshot")
+    parser.add_argument("--period", choices=TIME_SERIES_PERIODS, default='day',
+                        help="time series exported as daily_metrics: calendar buckets or trailing windows")
+    parser.add_argument("--shards", action="store_true",
+                        help="write a manifest and separately fetchable shards to dashboard_data/")
+    parser.add_argument("--page-size", type=int, default=CAMPAIGN_PAGE_SIZE,
+                        help="campaign rows per shard page (with --shards)")
+    parser.add_argument("--format", choices=JSON_ENCODERS,
+                        help="JSON encoding (default: indent, or compact with --shards)")
+    parser.add_argument("--columnar", action="store_true",
+                        help="write tables as column arrays instead of lists of row objects")
+    parser.add_argument("--profile", nargs="?", const="profile_metrics.json", metavar="METRICS_JSON",
+                        help="print per-stage timings and write them as JSON (default: profile_metrics.json)")
+    parser.add_argument("--cprofile", metavar="STATS_FILE",
+                        help="also dump cProfile statistics of the run, readable with pstats")
+    args = parser.parse_args(argv)
+    if args.columnar and args.shards:
+        parser.error("--columnar cannot be combined with --shards")
+    if args.backend == 'sqlite' and (args.incremental or args.stream or args.workers) and not args.accounts:
+        parser.error("--backend sqlite cannot be combined with --incremental, --stream or --workers")
+    if args.accounts and (args.incremental or args.stream or args.shards or args.columnar
+                          or args.profile or args.cprofile or args.sketch_by):
+        parser.error("--accounts cannot be combined with --incremental, --stream, --shards, --columnar, "
+                     "--profile, --cprofile or --sketch-by")
+    
+    if args.accounts:
+        print(f"Processing accounts in {args.accounts}...")
+        start = time.perf_counter()
+        results = process_accounts(args.accounts, "/home/runner/work/BI_Dasboard/BI_Dasboard/accounts",
+                                   workers=args.workers, period=args.period, encoder=args.format or 'indent',
+                                   backend=args.backend)
+        for account, result in results.items():
+            summary = result['summary']
+            print(f"- {account}: {result['rows']:,} rows{' (cached)' if result['cached'] else ''}, "
+                  f"spend ${summary.get('total_spend', 0):,}, ROAS {summary.get('overall_roas', 0)}")
+        print(f"Exported {len(results)} accounts in {time.perf_counter() - start:.1f}s")
+        return
+    
+    processor = DataProcessor(backend=args.backend)
+    if args.sketch_by:
+        processor.sketch_dimensions = (args.sketch_by,)
+    if args.profile:
+        processor.profiler = StageProfiler()
+    profile = cProfile.Profile() if args.cprofile else None
+    if profile is not None:
+        profile.enable()
+    
+    if args.incremental:
+        rows = processor.load_incremental()
+        print(f"Read {rows:,} new marketing rows")
+    elif args.stream:
+        rows = processor.load_streaming()
+        print(f"Streamed {rows:,} marketing rows")
+    elif args.workers:
+        rows = processor.load_parallel(workers=args.workers)
+        print(f"Aggregated {rows:,} marketing rows in {args.workers} worker processes")
+    elif args.no_cache:
+        processor.load_data()
+    elif processor.load_cached():
+        print("Loaded unchanged data from the " + ("SQLite database" if processor.store else "binary snapshot"))
     
     print("Processing marketing and business data...")
-    data = processor.export_dashboard_data()
+    if args.shards:
+        manifest = processor.export_dashboard_shards(page_size=args.page_size, period=args.period,
+                                                     encoder=args.format or 'compact')
+        print(f"Wrote {len(manifest['daily_metrics'])} daily and "
+              f"{len(manifest['campaign_performance']['pages'])} campaign shards")
+        summary = processor.get_summary_metrics()
+    else:
+        data = processor.export_dashboard_data(period=args.period, encoder=args.format or 'indent',
+                                               columnar=args.columnar)
+        summary = data['summary']
+    
+    if profile is not None:
+        profile.disable()
+        profile.dump_stats(args.cprofile)
     
     print(f"Dashboard data exported successfully!")
     print(f"Summary metrics:")
-    summary = data['summary']
     print(f"- Total Spend: ${summary['total_spend']:,}")
     print(f"- Total Attributed Revenue: ${summary['total_attributed_revenue']:,}")
     print(f"- Overall ROAS: {summary['overall_roas']}")
     print(f"- Total Orders: {summary['total_orders']:,}")
     print(f"- Marketing Attribution Rate: {summary['attribution_rate']}%")
+    
+    if args.sketch_by:
+        print(f"Sketches by {args.sketch_by}:")
+        for row in processor.get_sketches(args.sketch_by):
+            print(f"- {row[args.sketch_by]}: {row['rows']:,} rows, ~{row['distinct_campaigns']:,} campaigns, "
+                  f"~{row['distinct_states']} states, ~{row['distinct_tactics']} tactics, "
+                  f"spend p50/p90/p99 {row['spend_p50']}/{row['spend_p90']}/{row['spend_p99']}, "
+                  f"CPC p50/p90/p99 {row['cpc_p50']}/{row['cpc_p90']}/{row['cpc_p99']}")
+    
+    peak = peak_memory_mb()
+    if peak is not None:
+        print(f"Peak memory: {peak:.1f} MB")
+    
+    if processor.profiler is not None:
+        print(processor.profiler.format_table())
+        write_file_atomic(args.profile, encode_json(processor.profiler.to_dict(), 'indent'))
+        print(f"Stage metrics written to {args.profile}")
+    if profile is not None:
+        print(f"cProfile statistics written to {args.cprofile}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,267 @@
+"""
+Generate large synthetic marketing and business datasets for load testing
+Same distributions as generate_data.py, but every column is drawn for a whole chunk of
+days at once with NumPy and chunks are generated in parallel worker processes
+"""
+import argparse
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
+STATES = ['CA', 'NY', 'TX', 'FL', 'IL', 'PA', 'OH', 'MI', 'GA', 'NC']
+
+MARKETING_HEADER = 'date,tactic,state,campaign,impressions,clicks,spend,attributed_revenue\n'
+BUSINESS_HEADER = 'date,orders,new_orders,new_customers,total_revenue,gross_profit,cogs\n'
+
+# Per-platform distributions, matching generate_data.py. 'records' is the (low, high)
+# range of rows per campaign per day, or a float probability of a single row.
+PLATFORM_PROFILES = {
+    'facebook': {
+        'campaigns': {
+            'Brand_Awareness_Q1': 0.01,
+            'Conversion_Campaign_Jan': 0.025,
+            'Retargeting_Feb': 0.035,
+            'Product_Launch_Mar': 0.02
+        },
+        'tactics': ['Video_Ads', 'Carousel_Ads', 'Single_Image', 'Collection_Ads'],
+        'records': (1, 3),
+        'seasonality': 0.3,
+        'impressions': (5000, 1500, 100),
+        'ctr': (0.02, 0.005, 0.005, 0.08),
+        'cpc': (1.5, 0.5, 0.1),
+        'order_value': (85, 25, 20)
+    },
+    'google': {
+        'campaigns': {
+            'Search_Brand_Terms': 0.04,
+            'Shopping_Campaigns': 0.028,
+            'Display_Remarketing': 0.015,
+            'YouTube_Video_Ads': 0.012
+        },
+        'tactics': ['Search_Ads', 'Shopping_Ads', 'Display_Ads', 'Video_Ads'],
+        'records': (1, 2),
+        'seasonality': 0.2,
+        'impressions': (8000, 2000, 200),
+        'ctr': (0.035, 0.01, 0.01, 0.12),
+        'cpc': (2.1, 0.7, 0.2),
+        'order_value': (92, 30, 25)
+    },
+    'tiktok': {
+        'campaigns': {
+            'Gen_Z_Outreach': 0.018,
+            'Trend_Challenge': 0.022,
+            'Influencer_Collab': 0.025,
+            'Product_Demo_Videos': 0.02
+        },
+        'tactics': ['In_Feed_Ads', 'Spark_Ads', 'TopView_Ads', 'Branded_Hashtag'],
+        'records': 0.7,
+        'seasonality': 0.4,
+        'impressions': (12000, 4000, 500),
+        'ctr': (0.015, 0.008, 0.005, 0.06),
+        'cpc': (0.8, 0.3, 0.1),
+        'order_value': (65, 20, 15)
+    },
+}
+
+# Approximate number of rows generated per task
+CHUNK_ROWS = 1000000
+
+def expected_rows_per_day(profile):
+    """Average rows one copy of a platform's campaigns produces per day"""
+    records = profile['records']
+    per_campaign = records if isinstance(records, float) else (records[0] + records[1]) / 2
+    return per_campaign * len(profile['campaigns'])
+
+def campaign_names(profile, copies):
+    """Campaign names, each repeated copies times with a numeric suffix when copies > 1"""
+    if copies == 1:
+        return list(profile['campaigns'])
+    width = len(str(copies - 1))
+    return [f"{name}_{copy:0{width}d}" for name in profile['campaigns'] for copy in range(copies)]
+
+def chunk_dates(start, first_day, days):
+    """Return date strings and day-of-year / weekday arrays for a range of days"""
+    dates = [start + timedelta(days=first_day + offset) for offset in range(days)]
+    labels = np.array([date.strftime('%Y-%m-%d') for date in dates], dtype=object)
+    day_of_year = np.array([date.timetuple().tm_yday for date in dates])
+    weekday = np.array([date.weekday() for date in dates])
+    return labels, day_of_year, weekday
+
+def format_rows(columns):
+    """Join columns of strings into CSV lines"""
+    lines = '\n'.join(map(','.join, zip(*columns)))
+    return lines + '\n' if lines else lines
+
+def float_strings(values):
+    """Round to cents and format the way round(value, 2) prints"""
+    return list(map(repr, np.round(values, 2).tolist()))
+
+def generate_platform_chunk(platform, start, first_day, days, copies, seed, chunk):
+    """Generate the CSV text of one platform for days starting at first_day"""
+    profile = PLATFORM_PROFILES[platform]
+    rng = np.random.default_rng([seed, sorted(PLATFORM_PROFILES).index(platform), chunk])
+    labels, day_of_year, _ = chunk_dates(start, first_day, days)
+    
+    names = np.array(campaign_names(profile, copies), dtype=object)
+    conv_rates = np.repeat(np.array(list(profile['campaigns'].values())), copies)
+    tactics = np.array(profile['tactics'], dtype=object)
+    states = np.array(STATES, dtype=object)
+    
+    # Rows per (day, campaign), then one entry per row
+    records = profile['records']
+    if isinstance(records, float):
+        counts = (rng.random((days, len(names))) < records).astype(np.int64)
+    else:
+        counts = rng.integers(records[0], records[1] + 1, size=(days, len(names)))
+    group = np.repeat(np.arange(counts.size), counts.ravel())
+    day = group // len(names)
+    campaign = group % len(names)
+    n = len(group)
+    
+    seasonal = 1 + profile['seasonality'] * np.sin(2 * np.pi * day_of_year / 365)
+    mean, std, low = profile['impressions']
+    impressions = np.maximum(np.trunc(rng.normal(mean, std, n) * seasonal[day]), low).astype(np.int64)
+    mean, std, low, high = profile['ctr']
+    clicks = np.trunc(impressions * np.clip(rng.normal(mean, std, n), low, high)).astype(np.int64)
+    mean, std, low = profile['cpc']
+    spend = clicks * np.maximum(rng.normal(mean, std, n), low)
+    conversions = rng.binomial(clicks, conv_rates[campaign])
+    mean, std, low = profile['order_value']
+    attributed_revenue = conversions * np.maximum(rng.normal(mean, std, n), low)
+    
+    return format_rows([
+        labels[day].tolist(),
+        tactics[rng.integers(0, len(tactics), n)].tolist(),
+        states[rng.integers(0, len(states), n)].tolist(),
+        names[campaign].tolist(),
+        list(map(str, impressions.tolist())),
+        list(map(str, clicks.tolist())),
+        float_strings(spend),
+        float_strings(attributed_revenue)
+    ])
+
+def generate_business_chunk(start, first_day, days, total_days, seed, chunk):
+    """Generate the business CSV text for days starting at first_day"""
+    rng = np.random.default_rng([seed, len(PLATFORM_PROFILES), chunk])
+    labels, day_of_year, weekday = chunk_dates(start, first_day, days)
+    
+    seasonal = 1 + 0.25 * np.sin(2 * np.pi * day_of_year / 365)
+    weekend = np.where(weekday >= 5, 1.2, 1.0)
+    growth = 1 + (np.arange(first_day, first_day + days) / total_days) * 0.3
+    total_factor = seasonal * weekend * growth
+    
+    orders = np.maximum(np.trunc(rng.normal(450 * total_factor, 50)), 50).astype(np.int64)
+    new_orders = np.trunc(orders * np.clip(rng.normal(0.35, 0.05, days), 0.2, 0.6)).astype(np.int64)
+    new_customers = np.trunc(rng.normal(120 * total_factor, 20)).astype(np.int64)
+    new_customers = np.maximum(np.minimum(new_orders, new_customers), 20)
+    total_revenue = orders * np.maximum(rng.normal(78, 25, days), 20)
+    cogs = total_revenue * np.clip(rng.normal(0.45, 0.05, days), 0.3, 0.65)
+    
+    return format_rows([
+        labels.tolist(),
+        list(map(str, orders.tolist())),
+        list(map(str, new_orders.tolist())),
+        list(map(str, new_customers.tolist())),
+        float_strings(total_revenue),
+        float_strings(total_revenue - cogs),
+        float_strings(cogs)
+    ])
+
+def plan_tasks(start, days, copies, seed):
+    """List (filename, function, kwargs) tasks in file order, each about CHUNK_ROWS rows"""
+    tasks = []
+    for platform in sorted(PLATFORM_PROFILES):
+        rows_per_day = expected_rows_per_day(PLATFORM_PROFILES[platform]) * copies
+        chunk_days = max(1, int(CHUNK_ROWS // rows_per_day))
+        for chunk, first_day in enumerate(range(0, days, chunk_days)):
+            tasks.append((f'{platform}.csv', generate_platform_chunk, {
+                'platform': platform, 'start': start, 'first_day': first_day,
+                'days': min(chunk_days, days - first_day), 'copies': copies, 'seed': seed, 'chunk': chunk
+            }))
+    for chunk, first_day in enumerate(range(0, days, CHUNK_ROWS)):
+        tasks.append(('business.csv', generate_business_chunk, {
+            'start': start, 'first_day': first_day, 'days': min(CHUNK_ROWS, days - first_day),
+            'total_days': days, 'seed': seed, 'chunk': chunk
+        }))
+    return tasks
+
+def run_task(function, kwargs):
+    """Worker entry point: generate one chunk and return it as bytes"""
+    return function(**kwargs).encode('utf-8')
+
+def generate(output_dir, days, copies=1, seed=42, workers=None, start_date='2024-01-01'):
+    """Write facebook/google/tiktok/business CSVs to output_dir and return rows per file
+    
+    Chunks are seeded from (seed, file, chunk), so the output does not depend on the
+    number of workers. At most two chunks per worker are held in memory at a time.
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    tasks = plan_tasks(start, days, copies, seed)
+    
+    files = {}
+    rows = {}
+    try:
+        for filename, _, _ in tasks:
+            if filename not in files:
+                files[filename] = open(os.path.join(output_dir, filename), 'wb')
+                header = BUSINESS_HEADER if filename == 'business.csv' else MARKETING_HEADER
+                files[filename].write(header.encode('utf-8'))
+                rows[filename] = 0
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            queued = iter(tasks)
+            for filename, function, kwargs in queued:
+                pending.append((filename, executor.submit(run_task, function, kwargs)))
+                if len(pending) >= 2 * workers:
+                    break
+            while pending:
+                filename, future = pending.popleft()
+                body = future.result()
+                files[filename].write(body)
+                rows[filename] += body.count(b'\n')
+                for filename, function, kwargs in queued:
+                    pending.append((filename, executor.submit(run_task, function, kwargs)))
+                    break
+    finally:
+        for f in files.values():
+            f.close()
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate large synthetic datasets with NumPy")
+    parser.add_argument("--output-dir", default="/home/runner/work/BI_Dasboard/BI_Dasboard/data")
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--rows", type=int,
+                        help="approximate marketing rows to generate; campaigns are copied to reach it")
+    parser.add_argument("--campaign-copies", type=int, default=1,
+                        help="copies of every campaign per day (ignored with --rows)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    
+    copies = args.campaign_copies
+    if args.rows:
+        per_copy = sum(expected_rows_per_day(profile) for profile in PLATFORM_PROFILES.values()) * args.days
+        copies = max(1, math.ceil(args.rows / per_copy))
+    
+    print(f"Generating {args.days} days with {copies} cop{'y' if copies == 1 else 'ies'} of each campaign "
+          f"in {args.workers} worker processes...")
+    start = time.perf_counter()
+    rows = generate(args.output_dir, args.days, copies, args.seed, args.workers)
+    elapsed = time.perf_counter() - start
+    
+    marketing = sum(count for filename, count in rows.items() if filename != 'business.csv')
+    for filename, count in rows.items():
+        print(f"{filename}: {count:,} records")
+    print(f"Generated {marketing:,} marketing rows in {elapsed:.1f}s ({marketing / elapsed:,.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
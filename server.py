@@ -1,36 +1,576 @@
 #!/usr/bin/env python3
 """
 Simple HTTP server for the Marketing Intelligence Dashboard
+Serves the dashboard files plus live JSON aggregation endpoints under /api/
 """
+import argparse
+import email.utils
+import gzip
+import hashlib
 import http.server
-import socketserver
+import signal
 import os
+import threading
+import time
+import traceback
 import webbrowser
-from urllib.parse import quote
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import quote, urlsplit, parse_qs
+
+from data_processor import (DataProcessor, BACKENDS, CUBE_DIMENSIONS, FILTER_DIMENSIONS, PlatformRegistry,
+                            TIME_SERIES_PERIODS, discover_accounts, encode_json)
+
+DASHBOARD_DIR = "/home/runner/work/BI_Dasboard/BI_Dasboard"
+
+# Defaults for the concurrent server: worker threads and keep-alive idle timeout (seconds)
+DEFAULT_WORKERS = 32
+DEFAULT_KEEPALIVE_TIMEOUT = 5
+
+# Precompressed variants written by DataProcessor.export_dashboard_data, in order of preference
+PRECOMPRESSED_ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+# API responses larger than this many bytes are gzip-compressed on the fly
+COMPRESS_MIN_BYTES = 1024
+
+# Seconds between polls of the data directory, and how long files must stay unchanged
+# after a write before they are reloaded
+DEFAULT_WATCH_INTERVAL = 2.0
+DEFAULT_WATCH_DEBOUNCE = 1.0
+
+# Longest wait before retrying a reload that failed on files that have not changed since
+MAX_RELOAD_RETRY_DELAY = 60.0
+
+# path -> (size, mtime_ns, inode, content hash) of static files already hashed
+_file_hashes = {}
+_file_hashes_lock = threading.Lock()
+
+def file_hash(path, file, stat):
+    """Return the content hash of an open file, reusing it while size and mtime are unchanged"""
+    key = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    with _file_hashes_lock:
+        cached = _file_hashes.get(path)
+    if cached and cached[:3] == key:
+        return cached[3]
+    digest = hashlib.sha1()
+    for block in iter(lambda: file.read(1024 * 1024), b''):
+        digest.update(block)
+    file.seek(0)
+    with _file_hashes_lock:
+        _file_hashes[path] = key + (digest.hexdigest(),)
+    return digest.hexdigest()
+
+def accepted_encodings(header):
+    """Return the content codings an Accept-Encoding header allows (q > 0)"""
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip() and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+class BadRequest(Exception):
+    """Raised for API requests with invalid query parameters"""
+
+# Query parameters every API endpoint accepts
+FILTER_PARAMS = ('start_date', 'end_date') + FILTER_DIMENSIONS
+
+def query_values(params, name):
+    """Return the values of a query parameter that may be comma-separated and repeated"""
+    return [value for param in params.get(name, []) for value in param.split(',') if value]
+
+def parse_filters(params):
+    """Turn parsed API query parameters into DataProcessor filters
+
+    start_date/end_date take YYYY-MM-DD; platform, campaign, state and tactic accept
+    comma-separated values and may be repeated.
+    """
+    filters = {}
+    for name in ('start_date', 'end_date'):
+        if name in params:
+            value = params[name][-1]
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                raise BadRequest(f"{name} must be a YYYY-MM-DD date")
+            filters[name] = value
+    for dimension in FILTER_DIMENSIONS:
+        values = query_values(params, dimension)
+        if values:
+            filters[dimension] = values
+    return filters
+
+def get_rollup(processor, filters, params):
+    """Roll the cube up by the dimensions listed in the 'by' parameter"""
+    dimensions = query_values(params, 'by')
+    if not dimensions:
+        raise BadRequest(f"by must list one or more of: {', '.join(CUBE_DIMENSIONS)}")
+    try:
+        return processor.get_rollup(dimensions, filters)
+    except ValueError as e:
+        raise BadRequest(str(e))
+
+def get_sketches(processor, filters, params):
+    """Sketch distinct counts and quantiles, grouped by the dimension in 'by' if one is given"""
+    dimensions = query_values(params, 'by')
+    if len(dimensions) > 1:
+        raise BadRequest("by takes at most one dimension for sketches")
+    try:
+        return processor.get_sketches(dimensions[0] if dimensions else None, filters)
+    except ValueError as e:
+        raise BadRequest(str(e))
+
+def query_period(params):
+    """Return the time series period requested by the 'period' parameter (default 'day')"""
+    period = params.get('period', ['day'])[-1]
+    if period not in TIME_SERIES_PERIODS:
+        raise BadRequest(f"period must be one of: {', '.join(TIME_SERIES_PERIODS)}")
+    return period
+
+# API path -> (function(processor, filters, params) returning the payload, extra query parameters)
+API_ENDPOINTS = {
+    '/api/summary': (lambda processor, filters, params: processor.get_summary_metrics(filters=filters), ()),
+    '/api/daily': (lambda processor, filters, params: processor.get_time_series(query_period(params), filters=filters),
+                   ('period',)),
+    '/api/platforms': (lambda processor, filters, params: processor.get_platform_performance(filters=filters), ()),
+    '/api/campaigns': (lambda processor, filters, params: processor.get_campaign_performance(filters=filters), ()),
+    '/api/dashboard': (lambda processor, filters, params: processor.get_dashboard_data(filters, query_period(params)),
+                       ('period',)),
+    '/api/rollup': (get_rollup, ('by',)),
+    '/api/sketches': (get_sketches, ('by',)),
+    '/api/cache': (lambda processor, filters, params: processor.query_cache.stats(), ()),
+}
+
+# Processors of the accounts this worker process answers for, by data directory
+_account_processors = {}
+
+# Data directory -> (time.monotonic() of the last poll, poll_sources() signatures)
+_account_polls = {}
+
+def account_sources(data_dir, poll_interval):
+    """Return the source signatures of an account, polling its directory at most every poll_interval seconds"""
+    now = time.monotonic()
+    polled = _account_polls.get(data_dir)
+    if polled is None or now - polled[0] >= poll_interval:
+        polled = _account_polls[data_dir] = (now, poll_sources(data_dir))
+    return polled[1]
+
+def query_account(data_dir, path, filters, params, backend='memory', poll_interval=DEFAULT_WATCH_INTERVAL):
+    """Answer an API request for one account; runs in the account's worker process
+
+    The account's DataProcessor is loaded on first use and kept for later requests.
+    Its CSVs are checked for changes at most every poll_interval seconds; changed
+    files are parsed again.
+    """
+    processor = _account_processors.get(data_dir)
+    if processor is None or processor.source_signatures != account_sources(data_dir, poll_interval):
+        fresh = DataProcessor(data_dir, backend=backend)
+        if processor is None:
+            fresh.load_cached()
+        else:
+            fresh.reload_changed(processor)
+        fresh.build_indexes()
+        processor = _account_processors[data_dir] = fresh
+    function, _ = API_ENDPOINTS[path]
+    return function(processor, filters, params)
+
+class AccountWorkers:
+    """Worker processes that keep accounts' data loaded and answer their API requests
+
+    Each account subdirectory of root is pinned to one of processes single-process pools
+    by a stable hash of its name, so its data is loaded once, in one process, and stays
+    there between requests; accounts on different processes are queried in parallel.
+    An account's CSVs are checked for changes at most every poll_interval seconds.
+    """
+    def __init__(self, root, processes=None, backend='memory', poll_interval=DEFAULT_WATCH_INTERVAL):
+        self.root = root
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.accounts = set(discover_accounts(root))
+        self.pools = [ProcessPoolExecutor(max_workers=1, initializer=signal.signal,
+                                          initargs=(signal.SIGINT, signal.SIG_IGN))
+                      for _ in range(processes or os.cpu_count() or 1)]
+        # Start the processes now, before the server's threads exist
+        for pool in self.pools:
+            pool.submit(os.getpid).result()
+
+    def query(self, account, path, filters, params):
+        """Run an API endpoint for account in its worker process and return the payload"""
+        if account not in self.accounts:
+            # Accounts added since startup are picked up on first request
+            self.accounts = set(discover_accounts(self.root))
+            if account not in self.accounts:
+                raise BadRequest(f"unknown account: {account}")
+        pool = self.pools[zlib.crc32(account.encode('utf-8')) % len(self.pools)]
+        return pool.submit(query_account, os.path.join(self.root, account), path, filters, params,
+                           self.backend, self.poll_interval).result()
+
+    def shutdown(self):
+        for pool in self.pools:
+            pool.shutdown(wait=True)
+
+class DashboardServer(http.server.HTTPServer):
+    """HTTP server that handles connections on a bounded pool of worker threads
+
+    Each keep-alive connection occupies one worker until it goes idle for
+    keepalive_timeout seconds; further connections wait for a free worker. When every
+    worker is taken or a connection is waiting, responses close their connection
+    instead of keeping it idle, so idle connections never hold the last worker.
+    server_close() stops accepting, then lets in-flight requests finish.
+    """
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, processor=None,
+                 workers=DEFAULT_WORKERS, keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT, accounts=None):
+        super().__init__(server_address, handler_class)
+        self.processor = processor
+        # AccountWorkers answering requests that name an 'account', if serving several
+        self.accounts = accounts
+        self.keepalive_timeout = keepalive_timeout
+        self.shutting_down = False
+        self.workers = workers
+        # Accepted connections not yet picked up by a worker, and those being handled
+        self.waiting = 0
+        self.active = 0
+        self.connections_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dashboard")
+
+    def process_request(self, request, client_address):
+        with self.connections_lock:
+            self.waiting += 1
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        with self.connections_lock:
+            self.waiting -= 1
+            self.active += 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self.connections_lock:
+                self.active -= 1
+
+    def saturated(self):
+        """Return whether a new connection would have to wait for a worker"""
+        return self.waiting > 0 or self.active >= self.workers
+
+    def server_close(self):
+        self.shutting_down = True
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+def poll_sources(data_dir):
+    """Return the size and mtime of each source CSV in data_dir (None for a missing file)
+
+    Platform files are discovered the way DataProcessor does it, so a new channel's CSV
+    shows up as a change.
+    """
+    signatures = {}
+    try:
+        platforms = PlatformRegistry.discover(data_dir).filenames()
+    except OSError:
+        platforms = []
+    for filename in platforms + ["business.csv"]:
+        try:
+            stat = os.stat(os.path.join(data_dir, filename))
+        except FileNotFoundError:
+            signatures[filename] = None
+        else:
+            signatures[filename] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    return signatures
+
+class DataWatcher(threading.Thread):
+    """Background thread that reloads the server's data when the source CSVs change
+
+    The data directory is polled every interval seconds. A change is acted on once the
+    files have stayed the same for debounce seconds, so a burst of writes causes one
+    reload. Only changed CSVs are parsed again (DataProcessor.reload_changed); the new
+    processor is indexed and exported to export_file before it replaces server.processor,
+    so requests already running finish on the previous data. A failed reload keeps the
+    previous data and is retried, backing off to MAX_RELOAD_RETRY_DELAY while the files
+    stay unchanged.
+    """
+
+    def __init__(self, server, export_file=None, interval=DEFAULT_WATCH_INTERVAL, debounce=DEFAULT_WATCH_DEBOUNCE):
+        super().__init__(name="data-watcher", daemon=True)
+        self.server = server
+        self.export_file = export_file
+        self.interval = interval
+        self.debounce = debounce
+        self.stopped = threading.Event()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def run(self):
+        loaded = self.server.processor.source_signatures
+        pending = None
+        changed_at = None
+        failures = 0
+        while not self.stopped.wait(self.interval):
+            try:
+                signatures = poll_sources(self.server.processor.data_dir)
+            except OSError:
+                continue
+            if signatures == loaded:
+                pending = None
+                continue
+            if signatures != pending:
+                # Still being written: wait until it has been quiet for debounce seconds
+                pending = signatures
+                changed_at = time.monotonic()
+                failures = 0
+                continue
+            delay = self.debounce
+            if failures:
+                delay = min(max(self.debounce, self.interval) * 2 ** failures, MAX_RELOAD_RETRY_DELAY)
+            if time.monotonic() - changed_at < delay or None in signatures.values():
+                continue
+            if not self.reload():
+                failures += 1
+                changed_at = time.monotonic()
+                continue
+            loaded = pending
+            pending = None
+            failures = 0
+
+    def reload(self):
+        """Load the changed CSVs into a new processor and swap it in; return whether it was"""
+        previous = self.server.processor
+        start = time.perf_counter()
+        try:
+            processor = DataProcessor(previous.data_dir, backend=previous.backend)
+            changed = processor.reload_changed(previous)
+            processor.build_indexes()
+            if self.export_file:
+                processor.export_dashboard_data(self.export_file)
+        except Exception as e:
+            # Malformed rows raise IndexError or csv.Error, not just OSError/ValueError; the
+            # thread must survive them or auto-refresh stops for the life of the server
+            print(f"✗ reloading data failed, still serving the previous data: {type(e).__name__}: {e}", flush=True)
+            return False
+        self.server.processor = processor
+        print(f"✓ reloaded {', '.join(changed) or 'no files'}: {processor.marketing_row_count():,} marketing rows "
+              f"in {time.perf_counter() - start:.2f}s", flush=True)
+        return True
 
 class DashboardHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive between requests
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; with Nagle's algorithm the body waits
+    # for the client's delayed ACK of the headers on every reused connection
+    disable_nagle_algorithm = True
+
     def __init__(self, *args, **kwargs):
-        super().__init__(*args, directory="/home/runner/work/BI_Dasboard/BI_Dasboard", **kwargs)
-    
+        super().__init__(*args, directory=DASHBOARD_DIR, **kwargs)
+
+    def setup(self):
+        # Idle keep-alive connections time out so they release their worker
+        self.timeout = getattr(self.server, 'keepalive_timeout', None)
+        super().setup()
+
+    def send_head(self):
+        """Serve files with ETag/Last-Modified revalidation and precompressed variants"""
+        path = self.translate_path(self.path)
+        if path.endswith('/') or not os.path.isfile(path):
+            return super().send_head()
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            return super().send_head()
+
+        try:
+            fs = os.fstat(f.fileno())
+            etag = file_hash(path, f, fs)
+            encoding, variant = self.open_precompressed(path, fs)
+            body = variant or f
+            etag = f'"{etag}-{encoding}"' if encoding else f'"{etag}"'
+            if self.is_not_modified(etag, fs.st_mtime):
+                if body is not f:
+                    body.close()
+                f.close()
+                self.send_response(304)
+                self.send_validators(etag, fs.st_mtime)
+                self.end_headers()
+                return None
+            if body is not f:
+                f.close()
+
+            self.send_response(200)
+            self.send_header("Content-type", self.guess_type(path))
+            self.send_header("Content-Length", str(os.fstat(body.fileno()).st_size))
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            self.send_validators(etag, fs.st_mtime)
+            self.end_headers()
+            return body
+        except:
+            f.close()
+            raise
+
+    def open_precompressed(self, path, fs):
+        """Open the preferred up-to-date compressed variant of path the client accepts"""
+        accepted = accepted_encodings(self.headers.get('Accept-Encoding'))
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                variant = open(path + suffix, 'rb')
+            except OSError:
+                continue
+            # A variant older than the plain file belongs to a previous export
+            if os.fstat(variant.fileno()).st_mtime_ns >= fs.st_mtime_ns:
+                return encoding, variant
+            variant.close()
+        return None, None
+
+    def is_not_modified(self, etag, mtime):
+        """Check the request's conditional headers against the current representation"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags or f'W/{etag}' in tags
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since and mtime is not None:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, IndexError, OverflowError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return datetime.fromtimestamp(int(mtime), timezone.utc) <= since
+        return False
+
+    def send_validators(self, etag, mtime=None):
+        self.send_header("ETag", etag)
+        if mtime is not None:
+            self.send_header("Last-Modified", self.date_time_string(mtime))
+        self.send_header("Vary", "Accept-Encoding")
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.startswith('/api/'):
+            self.handle_api(url)
+        else:
+            super().do_GET()
+
+    def handle_api(self, url):
+        """Answer an API request from the server's in-memory DataProcessor
+
+        With an 'account' parameter the request is answered by that account's worker process.
+        """
+        path = url.path.rstrip('/')
+        endpoint = API_ENDPOINTS.get(path)
+        if endpoint is None:
+            self.send_json({'error': f"unknown endpoint {url.path}"}, status=404)
+            return
+        function, extra_params = endpoint
+        params = parse_qs(url.query)
+        account = params.pop('account', [None])[-1]
+        try:
+            unknown = set(params) - set(FILTER_PARAMS) - set(extra_params)
+            if unknown:
+                raise BadRequest(f"unknown query parameter: {', '.join(sorted(unknown))}")
+            if account is None:
+                payload = function(self.server.processor, parse_filters(params), params)
+            elif self.server.accounts is None:
+                raise BadRequest("account requires the server to be started with --accounts")
+            else:
+                payload = self.server.accounts.query(account, path, parse_filters(params), params)
+        except BadRequest as e:
+            self.send_json({'error': str(e)}, status=400)
+            return
+        except OSError as e:
+            self.send_json({'error': f"account data unavailable: {e}"}, status=503)
+            return
+        except Exception as e:
+            # Answer rather than drop the connection when a query fails unexpectedly
+            self.log_error("API request %s failed: %s: %s", url.path, type(e).__name__, e)
+            traceback.print_exc()
+            self.send_json({'error': f"internal error: {type(e).__name__}: {e}"}, status=500)
+            return
+        self.send_json(payload)
+
+    def send_json(self, payload, status=200):
+        body = encode_json(payload, 'orjson')
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        encoding = None
+        if len(body) >= COMPRESS_MIN_BYTES and 'gzip' in accepted_encodings(self.headers.get('Accept-Encoding')):
+            encoding = 'gzip'
+            etag = etag[:-1] + '-gzip"'
+        if status == 200 and self.is_not_modified(etag, None):
+            self.send_response(304)
+            self.send_validators(etag)
+            self.end_headers()
+            return
+        if encoding:
+            body = gzip.compress(body, compresslevel=5)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_validators(etag)
+        self.end_headers()
+        self.wfile.write(body)
+
     def end_headers(self):
-        self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
-        self.send_header('Pragma', 'no-cache')
-        self.send_header('Expires', '0')
+        # Close instead of idling when no worker would be left for a new connection
+        if getattr(self.server, 'shutting_down', False) or getattr(self.server, 'saturated', bool)():
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        # Always revalidate: exports rewrite files in place, and the ETag/Last-Modified
+        # checks turn an unchanged file into a cheap 304
+        self.send_header('Cache-Control', 'no-cache')
         super().end_headers()
 
-def main():
-    PORT = 8000
-    
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Marketing Intelligence Dashboard")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--bind", default="", help="address to listen on (default: all interfaces)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="maximum number of connections handled concurrently")
+    parser.add_argument("--keepalive-timeout", type=float, default=DEFAULT_KEEPALIVE_TIMEOUT,
+                        help="seconds an idle keep-alive connection is held open")
+    parser.add_argument("--no-watch", action="store_true",
+                        help="do not reload and re-export when the CSVs in data/ change")
+    parser.add_argument("--watch-interval", type=float, default=DEFAULT_WATCH_INTERVAL,
+                        help="seconds between checks of data/ for changed CSVs")
+    parser.add_argument("--watch-debounce", type=float, default=DEFAULT_WATCH_DEBOUNCE,
+                        help="seconds changed CSVs must stay unchanged before they are reloaded")
+    parser.add_argument("--backend", choices=BACKENDS, default='memory',
+                        help="keep the rows in memory or in an on-disk SQLite database that is queried with SQL")
+    parser.add_argument("--accounts", metavar="ROOT",
+                        help="also serve /api/...?account=NAME for every account subdirectory of ROOT")
+    parser.add_argument("--account-processes", type=int, default=os.cpu_count(),
+                        help="worker processes the accounts are spread over (with --accounts)")
+    args = parser.parse_args(argv)
+    PORT = args.port
+
     # Change to the dashboard directory
-    os.chdir("/home/runner/work/BI_Dasboard/BI_Dasboard")
-    
+    os.chdir(DASHBOARD_DIR)
+
     print("Marketing Intelligence Dashboard Server")
     print("=" * 50)
-    print(f"Starting server on port {PORT}")
+    print(f"Starting server on port {PORT} with {args.workers} workers")
     print(f"Dashboard URL: http://localhost:{PORT}")
     print(f"Dashboard files location: {os.getcwd()}")
     print()
-    
+
     # Check if required files exist
     required_files = ['index.html', 'dashboard_data.json']
     for file in required_files:
@@ -38,19 +578,55 @@ def main():
             print(f"✓ {file} found")
         else:
             print(f"✗ {file} not found")
-    
+
+    # Keep one processor with its rollups and indexes in memory for the API
+    processor = DataProcessor(os.path.join(DASHBOARD_DIR, "data"), backend=args.backend)
+    try:
+        processor.load_cached()
+        processor.build_indexes()
+        print(f"✓ {processor.marketing_row_count():,} marketing rows loaded for /api/")
+    except OSError as e:
+        print(f"✗ data not loaded, /api/ unavailable: {e}")
+
+    # Account processes are started before any server thread, so forking them is safe
+    accounts = None
+    if args.accounts:
+        accounts = AccountWorkers(args.accounts, args.account_processes, backend=args.backend,
+                                  poll_interval=args.watch_interval)
+        print(f"✓ {len(accounts.accounts)} accounts in {args.accounts} served by "
+              f"{len(accounts.pools)} worker processes (/api/...?account=NAME)")
+
     print("\nPress Ctrl+C to stop the server")
     print("-" * 50)
-    
+
     try:
-        with socketserver.TCPServer(("", PORT), DashboardHTTPRequestHandler) as httpd:
+        with DashboardServer((args.bind, PORT), DashboardHTTPRequestHandler, processor,
+                             workers=args.workers, keepalive_timeout=args.keepalive_timeout,
+                             accounts=accounts) as httpd:
+            # SIGTERM stops the accept loop; shutdown() must run off the serving thread
+            signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=httpd.shutdown).start())
             print(f"Server running at http://localhost:{PORT}/")
             print("Open this URL in your web browser to view the dashboard")
-            httpd.serve_forever()
+            print(f"API endpoints: {', '.join(sorted(API_ENDPOINTS))}")
+            watcher = None
+            if not args.no_watch:
+                watcher = DataWatcher(httpd, os.path.join(DASHBOARD_DIR, "dashboard_data.json"),
+                                      interval=args.watch_interval, debounce=args.watch_debounce)
+                watcher.start()
+                print(f"Watching {processor.data_dir} for changed CSVs")
+            try:
+                httpd.serve_forever()
+            finally:
+                if watcher is not None:
+                    watcher.stop()
+            print("\nServer stopped, in-flight requests finished")
     except KeyboardInterrupt:
         print("\nServer stopped by user")
     except Exception as e:
         print(f"Error starting server: {e}")
+    finally:
+        if accounts is not None:
+            accounts.shutdown()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()